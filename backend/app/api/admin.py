@@ -1,28 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import get_db, DBRunner, get_db_runner
 from app.db import models
+from app.core.gallery import get_gallery, bump_gallery_version, note_local_change
+from app.core.face_store import image_urls, release_face_image, delete_legacy_face_image
 import logging
-import os
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+def encode_name_cursor(name):
+    """Opaque, URL-safe cursor pointing just past the given user name."""
+    return base64.urlsafe_b64encode(name.encode()).decode()
+
+def decode_name_cursor(cursor):
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with prefix (None if unbounded)."""
+    while prefix and ord(prefix[-1]) == 0x10FFFF:
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def query_users(db: Session, limit=100, cursor=None, prefix=None):
+    """
+    One page of users ordered by name, with only the display columns (the embedding blob is
+    never loaded). Both the name prefix and the cursor are range conditions on the name index,
+    so a page costs the same however many users there are. Returns (rows, next_cursor).
+    """
+    user = models.User
+    query = db.query(user.id, user.name, user.created_at, user.image_hash)
+    if prefix:
+        query = query.filter(user.name >= prefix)
+        upper = prefix_upper_bound(prefix)
+        if upper is not None:
+            query = query.filter(user.name < upper)
+    if cursor:
+        query = query.filter(user.name > decode_name_cursor(cursor))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(user.name).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_name_cursor(rows[-1].name)
+    return rows, next_cursor
+
 @router.get("/users")
-def get_users(db: Session = Depends(get_db)):
-    """Fetch all registered users."""
-    users = db.query(models.User).all()
+async def get_users(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    prefix: Optional[str] = None,
+    db: DBRunner = Depends(get_db_runner),
+):
+    """
+    Registered users, ordered by name, optionally filtered by a name prefix.
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    rows, next_cursor = await db.run(query_users, limit, cursor, prefix)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    # Transform to include image URL
-    # Assuming we serve 'data/faces' at '/static/faces'
+    # Transform to include image URLs (the list shows the small thumbnail)
     user_list = []
-    for u in users:
-        safe_name = "".join([c for c in u.name if c.isalnum() or c in (' ', '-', '_')]).strip()
+    for u in rows:
+        image_url, thumbnail_url = image_urls(u.name, u.image_hash)
         user_list.append({
             "id": u.id,
             "name": u.name,
             "created_at": u.created_at,
-            "image_url": f"/static/faces/{safe_name}.jpg"
+            "image_url": image_url,
+            "thumbnail_url": thumbnail_url
         })
         
     return user_list
@@ -34,22 +90,28 @@ def delete_user(name: str, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # 1. Remove image from disk
-    try:
-        faces_dir = "data/faces"
-        safe_name = "".join([c for c in name if c.isalnum() or c in (' ', '-', '_')]).strip()
-        file_path = os.path.join(faces_dir, f"{safe_name}.jpg")
-        if os.path.exists(file_path):
-            os.remove(file_path)
-    except Exception as e:
-        logger.error(f"Failed to delete image for {name}: {e}")
-        
-    # 2. Remove from DB
+    # 1. Remove from DB
+    user_id = user.id
+    image_hash = user.image_hash
     try:
         db.delete(user)
+        version = bump_gallery_version(db)
         db.commit()
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete user from database")
 
+    # 2. Remove the reference image unless another user shares it
+    try:
+        if image_hash:
+            release_face_image(db, image_hash)
+        else:
+            delete_legacy_face_image(name)
+    except Exception as e:
+        logger.error(f"Failed to delete image for {name}: {e}")
+
+    # 3. Remove from the in-memory gallery
+    get_gallery().remove(user_id)
+    note_local_change(version)
+
     return {"status": "success", "message": f"User {name} deleted"}
@@ -1,72 +1,120 @@
-from fastapi import APIRouter, Form, Depends, HTTPException
+from fastapi import APIRouter, Form, File, UploadFile, Request, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db import models
-from app.core.face_utils import decode_image, get_face_embedding, extract_face, perform_liveness_check
+from app.db.embeddings import set_user_embedding
+from app.core.face_utils import decode_base64, analyze_image, reference_image
+from app.core.gallery import get_gallery, bump_gallery_version, note_local_change
+from app.core.face_store import encode_face_image, write_face_image, release_face_image
+from app.core.executor import run_in_executor
+from app.api.uploads import read_request_body, read_upload
+from app.core.metrics import stage
+from app.core.bulk_enroll import import_faces, iter_zip_images, summarize
 import logging
+import zipfile
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.post("/enroll")
 async def enroll_face(name: str = Form(...), image: str = Form(...), db: Session = Depends(get_db)):
-    # 1. Decode image
-    img = decode_image(image)
-    if img is None:
+    # The whole pipeline is CPU-bound, so it runs on the bounded executor, not the event loop
+    return await run_in_executor(_enroll_image, name, image, db, decode_base64)
+
+@router.post("/enroll/upload")
+async def enroll_upload(name: str = Form(...), file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Same as /enroll, but takes the JPEG/PNG as a multipart file (no base64 overhead)."""
+    data = await read_upload(file)
+    return await run_in_executor(_enroll_image, name, data, db)
+
+@router.post("/enroll/raw")
+async def enroll_raw(name: str, request: Request, db: Session = Depends(get_db)):
+    """Same as /enroll, but the request body is the raw JPEG/PNG and the name a query parameter."""
+    data = await read_request_body(request)
+    return await run_in_executor(_enroll_image, name, data, db)
+
+@router.post("/enroll/bulk")
+async def enroll_bulk(file: UploadFile = File(...)):
+    """
+    Enrolls every `<name>.jpg` / `.png` in a ZIP archive. Images are processed in chunks
+    with parallel detection/liveness and batched embedding, one transaction per chunk.
+    Returns a per-file report; files that fail do not abort the import.
+    """
+    if not zipfile.is_zipfile(file.file):
+        raise HTTPException(status_code=400, detail="Expected a ZIP archive")
+    # Long-running and internally parallel: keep it off the bounded request executor
+    report = await run_in_threadpool(import_faces, iter_zip_images(file.file))
+    return {
+        "status": "success",
+        "summary": summarize(report),
+        "results": report
+    }
+
+def _enroll_image(name: str, image, db: Session, decoder=None):
+    # 1. Decode, detect, liveness and embedding (cached by content hash for retried frames)
+    data = decoder(image) if decoder is not None else image
+    analysis, face_img = analyze_image(data, with_image=True) if data else (None, None)
+    if analysis is None:
         raise HTTPException(status_code=400, detail="Invalid image data")
 
     # 1.5 Liveness Check
-    face_img = extract_face(img)
-    if face_img is not None:
-        is_live, confidence = perform_liveness_check(face_img)
-        if not is_live:
-            logger.warning(f"Liveness Check Failed during enrollment for {name}. Confidence: {confidence}")
-            raise HTTPException(status_code=403, detail="NOT a REAL face")
+    if analysis.is_live is False:
+        logger.warning(f"Liveness Check Failed during enrollment for {name}. Confidence: {analysis.liveness_confidence}")
+        raise HTTPException(status_code=403, detail="NOT a REAL face")
     
-    # 2. Extract facial embeddings using the already-extracted face (FASTER)
-    embedding = get_face_embedding(face_img if face_img is not None else img)
+    # 2. Embedding of the extracted face (or of the whole image when no face was found)
+    embedding = analysis.embedding
     if embedding is None:
         raise HTTPException(status_code=400, detail="No face detected or could not extract embedding")
 
     # 3. Check if user already exists
     existing_user = db.query(models.User).filter(models.User.name == name).first()
+    previous_image = existing_user.image_hash if existing_user else None
     if existing_user:
         # Update existing user's embedding
-        existing_user.face_embedding = embedding
+        set_user_embedding(existing_user, embedding)
+        user = existing_user
         message = f"Biometric profile for {name} updated."
     else:
         # Create new user
-        new_user = models.User(name=name, face_embedding=embedding)
+        new_user = models.User(name=name)
+        set_user_embedding(new_user, embedding)
         db.add(new_user)
+        user = new_user
         message = f"Biometric profile for {name} registered."
     
-    # SAVE FACE IMAGE FOR ADMIN VERIFICATION
-    import cv2
-    import os
-    try:
-        faces_dir = "data/faces"
-        if not os.path.exists(faces_dir):
-            os.makedirs(faces_dir)
-        
-        # Determine which image to save (cropped face preferred)
-        save_img = face_img if face_img is not None else img
-        
-        # Ensure name is safe for filesystem
-        safe_name = "".join([c for c in name if c.isalnum() or c in (' ', '-', '_')]).strip()
-        file_path = os.path.join(faces_dir, f"{safe_name}.jpg")
-        
-        cv2.imwrite(file_path, save_img)
-    except Exception as e:
-        logger.error(f"Failed to save reference image: {e}")
-        # Don't fail the whole request just for the image
+    # SAVE FACE IMAGE FOR ADMIN VERIFICATION (cropped face preferred)
+    # Don't fail the whole request just for the image. The crop comes from the analysis,
+    # only a cache hit (retried enrollment) decodes the upload again
+    if face_img is None:
+        face_img = reference_image(data, analysis)
+    encoded = encode_face_image(face_img)
+    if encoded is not None:
+        user.image_hash = encoded[0]
 
     try:
-        db.commit()
+        with stage("db_commit"):
+            # Other workers see the new version and reload their gallery
+            version = bump_gallery_version(db)
+            db.commit()
     except Exception as e:
         db.rollback()
         logger.error(f"Database error: {e}")
         raise HTTPException(status_code=500, detail="Failed to save profile")
-    
+
+    # Written only now, so a rolled-back enrollment leaves no orphaned file
+    if encoded is not None:
+        write_face_image(encoded[1], face_img)
+
+    # Keep the in-memory gallery in sync without a full rebuild
+    get_gallery().add(user.id, embedding)
+    note_local_change(version)
+
+    # The replaced reference image goes once nobody else uses it
+    if previous_image and previous_image != user.image_hash:
+        release_face_image(db, previous_image)
+
     return {
         "status": "success",
         "message": message
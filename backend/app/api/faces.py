@@ -0,0 +1,34 @@
+import os
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from app.core.face_store import face_image_path, is_valid_hash
+
+router = APIRouter()
+
+# Stored images never change (the URL is their content hash), so clients may cache them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def _serve(request: Request, image_hash: str, thumbnail: bool):
+    if not is_valid_hash(image_hash):
+        raise HTTPException(status_code=404, detail="Image not found")
+    path = face_image_path(image_hash, thumbnail)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    # Strong validator: the content hash itself
+    etag = f'"{image_hash}{"-thumb" if thumbnail else ""}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
+
+@router.get("/faces/{image_hash}")
+def get_face_image(image_hash: str, request: Request):
+    """Reference face image from the content-addressed store."""
+    return _serve(request, image_hash, thumbnail=False)
+
+@router.get("/faces/{image_hash}/thumb")
+def get_face_thumbnail(image_hash: str, request: Request):
+    """Small precomputed thumbnail of a reference face image (used by the admin list)."""
+    return _serve(request, image_hash, thumbnail=True)
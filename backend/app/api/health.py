@@ -1,12 +1,43 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+from starlette.concurrency import run_in_threadpool
+from app.core.batching import batcher_stats
+from app.core.executor import get_executor
+from app.core.result_cache import get_result_cache
+from app.core.readiness import get_readiness
+from app.db.database import check_database
+from app.db.log_writer import get_log_writer
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
-    # You could add a check to see if DB is reachable
+    database = await run_in_threadpool(check_database)
     return {
-        "status": "ok", 
+        "status": "ok" if database["connected"] else "degraded",
         "service": "Face Access System",
-        "database": "connected" # Simplified for now
+        "database": database,
+        "models": get_readiness().status(),
+        # Queue depth and batch-size histograms of the inference batchers
+        "inference": batcher_stats(),
+        "executor": get_executor().stats(),
+        # Hit/miss counters of the content-hash analysis cache
+        "result_cache": get_result_cache().stats(),
+        "access_log_writer": get_log_writer().stats()
+    }
+
+@router.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Load balancer readiness probe: 200 only once the models are loaded and warmed up and
+    the database answers, 503 otherwise.
+    """
+    models = get_readiness().status()
+    database = await run_in_threadpool(check_database)
+    ready = models["ready"] and database["connected"]
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if ready else "not_ready",
+        "models": models,
+        "database": database
     }
@@ -1,22 +1,121 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import DBRunner, get_db_runner
 from app.db import models
+from app.core.config import settings
+from app.core.events import get_event_broker
 
 router = APIRouter()
 
+def encode_cursor(timestamp, log_id):
+    """Opaque, URL-safe keyset cursor pointing just past the given row."""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{log_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        timestamp, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def query_access_logs(db: Session, limit=50, cursor=None, user_id=None, status=None, start=None, end=None):
+    """
+    Newest-first page of access logs with user names, in one joined query.
+    Pages are keyed on (timestamp, id), so every page costs the same however deep it is.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    log = models.AccessLog
+    query = (
+        db.query(log.id, log.user_id, log.status, log.liveness_score, log.match_confidence, log.timestamp, models.User.name)
+        .outerjoin(models.User, models.User.id == log.user_id)
+    )
+    if user_id is not None:
+        query = query.filter(log.user_id == user_id)
+    if status is not None:
+        query = query.filter(log.status == status)
+    if start is not None:
+        query = query.filter(log.timestamp >= start)
+    if end is not None:
+        query = query.filter(log.timestamp < end)
+    if cursor:
+        query = query.filter(tuple_(log.timestamp, log.id) < tuple_(*decode_cursor(cursor)))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(log.timestamp.desc(), log.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+    return rows, next_cursor
+
 @router.get("/logs")
-async def get_access_logs(db: Session = Depends(get_db)):
-    logs = db.query(models.AccessLog).order_by(models.AccessLog.timestamp.desc()).limit(50).all()
-    # Join with users to get names
-    result = []
-    for log in logs:
-        user = db.query(models.User).filter(models.User.id == log.user_id).first()
-        result.append({
-            "id": log.id,
-            "user_name": user.name if user else "Unknown",
-            "status": log.status,
-            "match_confidence": log.match_confidence,
-            "timestamp": log.timestamp
-        })
-    return result
+async def get_access_logs(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: DBRunner = Depends(get_db_runner),
+):
+    """
+    Access logs, newest first. Filter by user, status and [start, end) time window.
+    The cursor for the next (older) page is returned in the X-Next-Cursor header.
+    """
+    rows, next_cursor = await db.run(query_access_logs, limit, cursor, user_id, status, start, end)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [
+        {
+            "id": row.id,
+            "user_id": row.user_id,
+            "user_name": row.name or "Unknown",
+            "status": row.status,
+            "liveness_score": row.liveness_score,
+            "match_confidence": row.match_confidence,
+            "timestamp": row.timestamp
+        }
+        for row in rows
+    ]
+
+@router.get("/logs/stream")
+async def stream_access_logs(request: Request):
+    """
+    Server-sent events: every access event is pushed as it happens (`event: access`).
+    Each client has a bounded buffer; if it falls behind, the oldest events are dropped and
+    an `event: overflow` tells it to re-sync from /logs.
+    """
+    broker = get_event_broker()
+
+    async def event_source():
+        # Subscribed only once the body starts, so the finally below always unsubscribes
+        subscription = broker.subscribe(settings.LOG_STREAM_BUFFER_SIZE)
+        reported_drops = 0
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                if subscription.dropped > reported_drops:
+                    yield f"event: overflow\ndata: {json.dumps({'dropped': subscription.dropped - reported_drops})}\n\n"
+                    reported_drops = subscription.dropped
+                yield f"event: access\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
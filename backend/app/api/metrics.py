@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.batching import batcher_stats
+from app.core.executor import get_executor
+from app.core.metrics import export_stats, render_metrics
+from app.core.result_cache import get_result_cache
+from app.db.log_writer import get_log_writer
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint: stage latencies, outcomes, model loads and queue gauges."""
+    export_stats("executor", get_executor().stats())
+    for name, stats in batcher_stats().items():
+        export_stats("batcher", stats, batcher=name)
+    export_stats("result_cache", get_result_cache().stats())
+    export_stats("access_log_writer", get_log_writer().stats())
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
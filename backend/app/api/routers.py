@@ -0,0 +1,25 @@
+"""
+Every API router with its prefix and tags. Both entrypoints (app/main.py and the root
+main.py started by run_backend.ps1) include this list, so they always expose the same API.
+"""
+from app.api import admin, enroll, faces, health, logs, metrics, stats, stream, verify
+
+# (router, prefix, tags)
+ROUTERS = [
+    (health.router, "/api", ["Health"]),
+    (verify.router, "/api", ["Access"]),
+    (stream.router, "/api", ["Access"]),
+    (enroll.router, "/api", ["Enroll"]),
+    (admin.router, "/api", ["Admin"]),
+    (faces.router, "/api", ["Faces"]),
+    # Listing, live SSE stream (/logs/stream) and rollup stats
+    (logs.router, "/api", ["Logs"]),
+    (stats.router, "/api", ["Logs"]),
+    # Prometheus scrape endpoint, at the conventional /metrics path
+    (metrics.router, "", ["Metrics"]),
+]
+
+
+def include_routers(app):
+    for router, prefix, tags in ROUTERS:
+        app.include_router(router, prefix=prefix, tags=tags)
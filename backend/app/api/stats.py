@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from app.db.database import DBRunner, get_db_runner
+from app.db.stats import GRANULARITIES, bucket_start, query_stats
+
+router = APIRouter()
+
+# Default window per granularity when no start is given
+DEFAULT_WINDOWS = {
+    "minute": timedelta(hours=1),
+    "hour": timedelta(days=1),
+    "day": timedelta(days=30),
+}
+
+@router.get("/stats")
+async def get_access_stats(
+    granularity: str = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    db: DBRunner = Depends(get_db_runner),
+):
+    """
+    Grants/denials/spoofs per minute, hour or day, for everyone or a single user (user_id=0
+    means events without a matched user). Served from pre-aggregated rollups, so the cost
+    does not grow with the access_logs table.
+    """
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    end = end or datetime.now(timezone.utc)
+    start = start or bucket_start(end - DEFAULT_WINDOWS[granularity], granularity)
+
+    buckets = {}
+    for row in await db.run(query_stats, granularity, start, end, user_id):
+        bucket = buckets.setdefault(row.bucket_start, {"bucket_start": row.bucket_start, "granted": 0, "denied": 0, "spoof": 0})
+        bucket[row.status] = bucket.get(row.status, 0) + row.count
+
+    return {
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "user_id": user_id,
+        "buckets": list(buckets.values())
+    }
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
+
+from app.db.database import SessionLocal
+from app.core.config import settings
+from app.core.executor import run_in_executor
+from app.core.face_utils import decode_image, decode_image_bytes, detect_face, crop_face
+from app.core.tracking import FaceTracker, box_iou
+from app.api.verify import evaluate_face
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+class StreamSession:
+    """
+    Per-connection state of a streaming verification.
+    Full face detection only runs every STREAM_DETECT_EVERY frames or when the tracker
+    loses the face; liveness + embedding run once per track (and again every
+    STREAM_REVERIFY_EVERY frames if set).
+    """
+
+    def __init__(self):
+        self.tracker = FaceTracker(min_score=settings.STREAM_TRACK_MIN_SCORE)
+        self.frame_index = 0
+        self.track_id = 0
+        self.frames_since_detect = 0
+        self.frames_since_decision = 0
+        self.decided = False
+
+    def _new_track(self, frame, box):
+        self.tracker.start(frame, box)
+        self.track_id += 1
+        self.decided = False
+
+    def _locate_face(self, frame):
+        """Returns the face box for this frame, re-detecting only when needed."""
+        if self.tracker.active and self.frames_since_detect < settings.STREAM_DETECT_EVERY:
+            box = self.tracker.update(frame)
+            if box is not None:
+                self.frames_since_detect += 1
+                return box
+
+        had_track = self.tracker.active
+        box = detect_face(frame)
+        self.frames_since_detect = 0
+        if box is None:
+            self.tracker.reset()
+        elif had_track and box_iou(box, self.tracker.box) >= 0.3:
+            # Periodic re-detection of the same face: re-anchor the track, keep its decision
+            self.tracker.start(frame, box)
+        else:
+            self._new_track(frame, box)
+        return box
+
+    def process_frame(self, payload, decoder):
+        """Handles one frame (runs on the executor). Returns a message to push, or None."""
+        frame = decoder(payload)
+        if frame is None:
+            return {"type": "error", "message": "Invalid image data"}
+        self.frame_index += 1
+
+        had_face = self.tracker.active
+        box = self._locate_face(frame)
+        if box is None:
+            return {"type": "no_face", "frame": self.frame_index} if had_face else None
+
+        self.frames_since_decision += 1
+        reverify = settings.STREAM_REVERIFY_EVERY > 0 and self.frames_since_decision >= settings.STREAM_REVERIFY_EVERY
+        if self.decided and not reverify:
+            return None
+
+        with SessionLocal() as db:
+            result = evaluate_face(crop_face(frame, box), db)
+        self.decided = True
+        self.frames_since_decision = 0
+        return {"type": "decision", "frame": self.frame_index, "track": self.track_id, "box": list(box), **result}
+
+
+@router.websocket("/ws/verify")
+async def verify_stream(websocket: WebSocket):
+    """
+    Streaming verification. Send frames as binary JPEG/PNG messages (or base64 text messages,
+    like the /verify form field); decisions are pushed back as JSON as soon as they are made.
+    If frames arrive faster than they can be processed, only the newest one is kept.
+    """
+    await websocket.accept()
+    session = StreamSession()
+    latest = {"frame": None, "closed": False, "dropped": 0}
+    frame_ready = asyncio.Event()
+
+    async def receive_frames():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    frame = (message["bytes"], decode_image_bytes)
+                elif message.get("text") is not None:
+                    frame = (message["text"], decode_image)
+                else:
+                    continue
+                if latest["frame"] is not None:
+                    latest["dropped"] += 1
+                latest["frame"] = frame
+                frame_ready.set()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            latest["closed"] = True
+            frame_ready.set()
+
+    receiver = asyncio.create_task(receive_frames())
+    try:
+        while True:
+            await frame_ready.wait()
+            frame_ready.clear()
+            if latest["closed"]:
+                break
+            frame, latest["frame"] = latest["frame"], None
+            if frame is None:
+                continue
+            try:
+                message = await run_in_executor(session.process_frame, *frame)
+            except HTTPException as e:
+                # Executor saturated: skip this frame, the client keeps streaming
+                message = {"type": "busy", "message": e.detail}
+            if message is not None:
+                await websocket.send_json(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        logger.info(f"Stream closed after {session.frame_index} frames ({latest['dropped']} dropped, {session.track_id} tracks)")
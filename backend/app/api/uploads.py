@@ -0,0 +1,41 @@
+"""Size-capped reading of image uploads, so an oversized body is rejected before it is buffered."""
+from fastapi import HTTPException, Request, UploadFile
+from app.core.config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _max_bytes():
+    return settings.MAX_UPLOAD_MB * 1024 * 1024
+
+
+def _too_large():
+    return HTTPException(status_code=413, detail=f"Image larger than {settings.MAX_UPLOAD_MB} MB")
+
+
+async def read_request_body(request: Request) -> bytes:
+    """The raw request body, refused by Content-Length up front and by size while streaming."""
+    max_bytes = _max_bytes()
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > max_bytes:
+        raise _too_large()
+    body = bytearray()
+    # Chunked or mislabelled bodies are still cut off as soon as they pass the cap
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise _too_large()
+    return bytes(body)
+
+
+async def read_upload(file: UploadFile) -> bytes:
+    """The contents of a multipart file, read in bounded chunks."""
+    max_bytes = _max_bytes()
+    if getattr(file, "size", None) is not None and file.size > max_bytes:
+        raise _too_large()
+    data = bytearray()
+    while chunk := await file.read(CHUNK_SIZE):
+        data += chunk
+        if len(data) > max_bytes:
+            raise _too_large()
+    return bytes(data)
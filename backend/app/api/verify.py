@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Form, Depends, HTTPException
+from fastapi import APIRouter, Form, File, UploadFile, Request, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db import models
-from app.core.face_utils import decode_image, get_face_embedding, verify_face, extract_face, perform_liveness_check
+from app.db.log_writer import get_log_writer
+from app.core.face_utils import decode_base64, get_face_embedding, analyze_face, analyze_image
+from app.core.gallery import sync_gallery
+from app.core.config import settings
+from app.core.executor import run_in_executor
+from app.api.uploads import read_request_body, read_upload
+from app.core.metrics import VERIFY_OUTCOMES, stage
 import logging
 
 router = APIRouter()
@@ -10,17 +16,58 @@ logger = logging.getLogger(__name__)
 
 @router.post("/verify")
 async def verify_user(image: str = Form(...), db: Session = Depends(get_db)):
-    # 1. Decode image
-    img = decode_image(image)
-    if img is None:
+    # The whole pipeline is CPU-bound, so it runs on the bounded executor, not the event loop
+    return await run_in_executor(_verify_image, image, db, decode_base64)
+
+@router.post("/verify/upload")
+async def verify_upload(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Same as /verify, but takes the JPEG/PNG as a multipart file (no base64 overhead)."""
+    data = await read_upload(file)
+    return await run_in_executor(_verify_image, data, db)
+
+@router.post("/verify/raw")
+async def verify_raw(request: Request, db: Session = Depends(get_db)):
+    """Same as /verify, but the request body is the raw JPEG/PNG (application/octet-stream)."""
+    data = await read_request_body(request)
+    return await run_in_executor(_verify_image, data, db)
+
+def _verify_image(image, db: Session, decoder=None):
+    # 1. Decode, detect, liveness and embedding (cached by content hash for retried frames)
+    data = decoder(image) if decoder is not None else image
+    analysis = analyze_image(data) if data else None
+    if analysis is None:
         raise HTTPException(status_code=400, detail="Invalid image data")
+    return decide_access(db, analysis.is_live, analysis.liveness_confidence, analysis.embedding, face_found=analysis.box is not None)
+
+def evaluate_face(face_img, db: Session, check_liveness=True):
+    """
+    Runs liveness, embedding and gallery matching on a face crop and logs the outcome.
+    Used by the streaming endpoint. Returns the JSON response body.
+    """
+    if check_liveness:
+        is_live, liveness_conf, probe_embedding = analyze_face(face_img)
+    else:
+        with stage("embedding"):
+            is_live, liveness_conf, probe_embedding = None, None, get_face_embedding(face_img)
+    return decide_access(db, is_live, liveness_conf, probe_embedding)
+
+def decide_access(db: Session, is_live, liveness_conf, probe_embedding, face_found=True):
+    """
+    Turns a liveness verdict (is_live None = not checked) and probe embedding into the
+    access decision and logs the outcome. Returns the JSON response body.
+    """
+    log_writer = get_log_writer()
+    liveness_score = None
+    # Denials of frames without a detected face are counted separately
+    denied = "denied" if face_found else "no_face"
 
     # 1.5 Liveness Check
-    face_img = extract_face(img)
-    if face_img is not None:
-        is_live, liveness_conf = perform_liveness_check(face_img)
+    if is_live is not None:
+        liveness_score = int(liveness_conf * 100)
         if not is_live:
             logger.warning(f"Spoof Attempt Detected! Liveness confidence: {liveness_conf}")
+            log_writer.record("spoof", liveness_score=liveness_score)
+            VERIFY_OUTCOMES.inc(outcome="spoof")
             return {
                 "status": "denied",
                 "identity": "Spoof Machine",
@@ -29,9 +76,10 @@ async def verify_user(image: str = Form(...), db: Session = Depends(get_db)):
                 "liveness_confidence": float(liveness_conf)
             }
     
-    # 2. Extract embedding from probe image (FASTER)
-    probe_embedding = get_face_embedding(face_img if face_img is not None else img)
+    # 2. Probe embedding (computed by the caller)
     if probe_embedding is None:
+        log_writer.record("denied", liveness_score=liveness_score)
+        VERIFY_OUTCOMES.inc(outcome=denied)
         return {
             "status": "denied",
             "identity": "Unknown",
@@ -39,9 +87,11 @@ async def verify_user(image: str = Form(...), db: Session = Depends(get_db)):
             "access": False
         }
 
-    # 3. Fetch all registered users
-    users = db.query(models.User).all()
-    if not users:
+    # 3. Match against the in-memory gallery index (reloaded if another worker changed it)
+    gallery = sync_gallery(db)
+    if len(gallery) == 0:
+        log_writer.record("denied", liveness_score=liveness_score)
+        VERIFY_OUTCOMES.inc(outcome=denied)
         return {
             "status": "denied",
             "identity": "Unknown",
@@ -50,21 +100,25 @@ async def verify_user(image: str = Form(...), db: Session = Depends(get_db)):
         }
 
     # 4. Compare embeddings
-    registered_embeddings = [u.face_embedding for u in users]
-    match_idx, distance = verify_face(probe_embedding, registered_embeddings)
+    with stage("gallery_search"):
+        match_id, distance = gallery.search(probe_embedding, threshold=settings.FACE_MATCH_THRESHOLD)
+    matched_user = None
+    if match_id is not None:
+        with stage("db"):
+            matched_user = db.query(models.User).filter(models.User.id == match_id).first()
 
-    if match_idx is not None:
-        matched_user = users[match_idx]
+    if matched_user is not None:
         confidence = 1.0 - distance
         
-        # Log access
-        access_log = models.AccessLog(
+        # Log access (written in the background, off the request path)
+        log_writer.record(
+            "granted",
             user_id=matched_user.id,
-            status="granted",
+            user_name=matched_user.name,
+            liveness_score=liveness_score,
             match_confidence=int(confidence * 100)
         )
-        db.add(access_log)
-        db.commit()
+        VERIFY_OUTCOMES.inc(outcome="granted")
 
         return {
             "status": "success",
@@ -74,6 +128,8 @@ async def verify_user(image: str = Form(...), db: Session = Depends(get_db)):
         }
     else:
         # Log denied access
+        log_writer.record("denied", liveness_score=liveness_score, match_confidence=int((1.0 - distance) * 100))
+        VERIFY_OUTCOMES.inc(outcome=denied)
         return {
             "status": "denied",
             "identity": "Unknown",
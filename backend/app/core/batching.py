@@ -0,0 +1,94 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Every batcher registers itself here so its stats can be reported by the API
+_batchers = {}
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching queue for model inference.
+    Callers submit single items and get a Future back. A worker thread collects up to
+    `max_batch_size` items, or whatever arrived within `max_wait_ms` of the first one,
+    and runs them through `batch_fn` in one forward pass.
+    `batch_fn` takes a list of items and returns one result per item, in order.
+    """
+
+    def __init__(self, name, batch_fn, max_batch_size=16, max_wait_ms=5.0):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._histogram = {}  # batch size -> number of batches
+        _batchers[name] = self
+
+    def submit(self, item):
+        """Queues one item for inference. Returns a concurrent.futures.Future."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                    self._thread.start()
+
+    def _collect(self):
+        """Blocks for the first item, then gathers more until the batch is full or the wait expires."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Deadline passed: still take whatever is already waiting
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._histogram[len(batch)] = self._histogram.get(len(batch), 0) + 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._histogram.items())),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
+
+
+def batcher_stats():
+    """Stats of every batcher created in this process, keyed by name."""
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
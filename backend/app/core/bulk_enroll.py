@@ -0,0 +1,236 @@
+"""
+Bulk enrollment: imports a ZIP archive or a directory of `<name>.jpg` files.
+
+Files are processed in chunks. Within a chunk, decoding, face detection and liveness run
+in parallel threads (OpenCV and the liveness batcher release the GIL), all surviving faces
+are embedded in batched forward passes, and the users are written in one transaction.
+
+CLI (run from the `backend` folder):
+    python -m app.core.bulk_enroll <archive.zip | directory> [--chunk-size N] [--workers N]
+Running servers pick up users imported by the CLI at their next gallery sync
+(GALLERY_SYNC_INTERVAL_S).
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import settings
+from .face_utils import decode_image_bytes, extract_face, perform_liveness_check
+from .embedding_utils import get_face_embeddings
+from .face_store import encode_face_image, write_face_image, release_face_image
+from .gallery import get_gallery, bump_gallery_version, note_local_change
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+def name_from_filename(filename):
+    """`people/Jane Doe.jpg` -> `Jane Doe`; None for files that are not enrollment images."""
+    base = os.path.basename(filename)
+    stem, ext = os.path.splitext(base)
+    if ext.lower() not in IMAGE_EXTENSIONS or base.startswith(".") or not stem.strip():
+        return None
+    return stem.strip()
+
+
+def iter_zip_images(data):
+    """Yields (filename, bytes) for the images in a ZIP archive, reading entries lazily."""
+    max_bytes = settings.BULK_ENROLL_MAX_FILE_MB * 1024 * 1024
+    with zipfile.ZipFile(io.BytesIO(data) if isinstance(data, bytes) else data) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or "__MACOSX" in info.filename or name_from_filename(info.filename) is None:
+                continue
+            if info.file_size > max_bytes:
+                yield info.filename, None
+                continue
+            yield info.filename, archive.read(info)
+
+
+def iter_directory_images(path):
+    """Yields (filename, bytes) for the images in a directory tree, sorted by path."""
+    max_bytes = settings.BULK_ENROLL_MAX_FILE_MB * 1024 * 1024
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted(files):
+            if name_from_filename(filename) is None:
+                continue
+            full_path = os.path.join(root, filename)
+            if os.path.getsize(full_path) > max_bytes:
+                yield os.path.relpath(full_path, path), None
+                continue
+            with open(full_path, "rb") as f:
+                yield os.path.relpath(full_path, path), f.read()
+
+
+def prepare_face(filename, data):
+    """Decode -> detect -> liveness for one file. Returns (report_entry, face_img or None)."""
+    name = name_from_filename(filename)
+    entry = {"file": filename, "name": name}
+    if data is None:
+        entry.update(status="error", detail="File too large")
+        return entry, None
+    img = decode_image_bytes(data)
+    if img is None:
+        entry.update(status="error", detail="Invalid image data")
+        return entry, None
+    face_img = extract_face(img)
+    if face_img is not None:
+        is_live, confidence = perform_liveness_check(face_img)
+        if not is_live:
+            entry.update(status="rejected", detail=f"Liveness check failed ({confidence:.2f})")
+            return entry, None
+    # Same fallback as /enroll: embed the whole image when no face was detected
+    return entry, face_img if face_img is not None else img
+
+
+def _write_chunk(session_factory, prepared, embeddings, update_gallery):
+    """Creates/updates the users of one chunk in a single transaction."""
+    from app.db import models
+    from app.db.embeddings import set_user_embedding
+
+    db = session_factory()
+    try:
+        names = {entry["name"] for entry, _ in prepared}
+        users = {u.name: u for u in db.query(models.User).filter(models.User.name.in_(names))}
+        enrolled = []
+        replaced_images = set()
+        # hash -> (JPEG bytes, image), written after the commit
+        new_images = {}
+        for (entry, face_img), embedding in zip(prepared, embeddings):
+            user = users.get(entry["name"])
+            if user is None:
+                user = models.User(name=entry["name"])
+                db.add(user)
+                users[entry["name"]] = user
+                entry["status"] = "enrolled"
+            else:
+                # Existing user, or the same name twice in one import: the last file wins
+                entry["status"] = "updated"
+            set_user_embedding(user, embedding)
+            encoded = encode_face_image(face_img)
+            if encoded is not None:
+                image_hash = encoded[0]
+                new_images[image_hash] = (encoded[1], face_img)
+                if user.image_hash and user.image_hash != image_hash:
+                    replaced_images.add(user.image_hash)
+                user.image_hash = image_hash
+            enrolled.append((user, embedding))
+        # Assign ids before the commit expires the objects
+        db.flush()
+        # Images this chunk leaves referenced (the same name twice: only the last file's)
+        kept_images = {user.image_hash for user, _ in enrolled if user.image_hash}
+        enrolled = [(user.id, embedding) for user, embedding in enrolled]
+        version = bump_gallery_version(db)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        db.close()
+        print(f"Bulk enrollment: chunk failed: {e}")
+        for entry, _ in prepared:
+            entry.update(status="error", detail="Failed to save profile")
+        return
+
+    try:
+        # Written only now, so a failed chunk leaves no orphaned files
+        for image_hash, (data, face_img) in new_images.items():
+            if image_hash in kept_images:
+                write_face_image(data, face_img)
+        for image_hash in replaced_images - kept_images:
+            release_face_image(db, image_hash)
+    finally:
+        db.close()
+
+    if update_gallery:
+        gallery = get_gallery()
+        for user_id, embedding in enrolled:
+            gallery.add(user_id, embedding)
+        note_local_change(version)
+
+
+def import_faces(items, session_factory=None, chunk_size=None, workers=None, update_gallery=True):
+    """
+    Enrolls (filename, bytes) pairs. Returns the per-file report: one entry per image with
+    status "enrolled", "updated", "rejected" (liveness) or "error". Non-image files are skipped.
+    """
+    if session_factory is None:
+        from app.db.database import SessionLocal
+        session_factory = SessionLocal
+    chunk_size = chunk_size or settings.BULK_ENROLL_CHUNK_SIZE
+    workers = workers or settings.BULK_ENROLL_WORKERS
+
+    report = []
+    chunk = []
+
+    def flush(pool):
+        prepared = []
+        for entry, face_img in pool.map(lambda item: prepare_face(*item), chunk):
+            report.append(entry)
+            if face_img is not None:
+                prepared.append((entry, face_img))
+        chunk.clear()
+        if not prepared:
+            return
+        try:
+            embeddings = get_face_embeddings([face_img for _, face_img in prepared])
+        except Exception as e:
+            print(f"Bulk enrollment: embedding failed: {e}")
+            for entry, _ in prepared:
+                entry.update(status="error", detail="Could not extract embedding")
+            return
+        _write_chunk(session_factory, prepared, embeddings, update_gallery)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for filename, data in items:
+            if name_from_filename(filename) is None:
+                continue
+            chunk.append((filename, data))
+            if len(chunk) >= chunk_size:
+                flush(pool)
+        if chunk:
+            flush(pool)
+    return report
+
+
+def summarize(report):
+    counts = {}
+    for entry in report:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-enroll a ZIP archive or directory of <name>.jpg files.")
+    parser.add_argument("source", help="ZIP archive or directory")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    from .startup import init_database
+    init_database()
+
+    if os.path.isdir(args.source):
+        items = iter_directory_images(args.source)
+        source = None
+    else:
+        source = open(args.source, "rb")
+        items = iter_zip_images(source)
+
+    start = time.perf_counter()
+    try:
+        report = import_faces(items, chunk_size=args.chunk_size, workers=args.workers, update_gallery=False)
+    finally:
+        if source is not None:
+            source.close()
+    for entry in report:
+        if entry["status"] in ("rejected", "error"):
+            print(f"{entry['status']:<8} {entry['file']}: {entry['detail']}")
+    counts = ", ".join(f"{n} {status}" for status, n in sorted(summarize(report).items()))
+    print(f"Processed {len(report)} images in {time.perf_counter() - start:.1f}s ({counts or 'nothing to import'})")
+    return 0 if all(e["status"] in ("enrolled", "updated") for e in report) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
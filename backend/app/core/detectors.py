@@ -0,0 +1,99 @@
+import cv2
+import numpy as np
+import os
+import threading
+
+from .config import settings
+
+ML_MODEL_DIR = os.path.join(os.path.dirname(__file__), "../../ml_model")
+# OpenCV Zoo YuNet model (face_detection_yunet_2023mar.onnx)
+YUNET_MODEL_PATH = os.path.join(ML_MODEL_DIR, "face_detection_yunet_2023mar.onnx")
+# OpenCV's res10 SSD face detector (deploy.prototxt + res10_300x300_ssd_iter_140000.caffemodel)
+RES10_PROTOTXT_PATH = os.path.join(ML_MODEL_DIR, "deploy.prototxt")
+RES10_MODEL_PATH = os.path.join(ML_MODEL_DIR, "res10_300x300_ssd_iter_140000.caffemodel")
+
+class HaarDetector:
+    """OpenCV Haar cascade: no model download needed, but slower and prone to false positives."""
+
+    name = "haar"
+
+    def __init__(self, scale_factor=1.1, min_neighbors=4, min_face_size=0):
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = (min_face_size, min_face_size)
+
+    def detect(self, image):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors, minSize=self.min_size)
+        return [tuple(int(v) for v in f) for f in faces]
+
+class YuNetDetector:
+    """OpenCV's YuNet CNN detector (cv2.FaceDetectorYN): fast on CPU and much more precise than Haar."""
+
+    name = "yunet"
+
+    def __init__(self, model_path, confidence=0.8, min_face_size=0):
+        self.detector = cv2.FaceDetectorYN.create(model_path, "", (320, 320), confidence, 0.3, 50)
+        self.min_face_size = min_face_size
+
+    def detect(self, image):
+        height, width = image.shape[:2]
+        self.detector.setInputSize((width, height))
+        _, faces = self.detector.detect(image)
+        if faces is None:
+            return []
+        boxes = [tuple(int(v) for v in f[:4]) for f in faces]
+        return [b for b in boxes if min(b[2], b[3]) >= self.min_face_size]
+
+class Res10Detector:
+    """OpenCV's res10 SSD face detector run through cv2.dnn."""
+
+    name = "res10"
+
+    def __init__(self, prototxt_path, model_path, confidence=0.8, min_face_size=0):
+        self.net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
+        self.confidence = confidence
+        self.min_face_size = min_face_size
+
+    def detect(self, image):
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(cv2.resize(image, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+        boxes = []
+        for det in detections[detections[:, 2] >= self.confidence]:
+            x1, y1, x2, y2 = (det[3:7] * np.array([width, height, width, height])).astype(int)
+            x1, y1 = max(0, x1), max(0, y1)
+            w, h = min(width, x2) - x1, min(height, y2) - y1
+            if min(w, h) >= max(1, self.min_face_size):
+                boxes.append((int(x1), int(y1), int(w), int(h)))
+        return boxes
+
+def create_detector(name=None):
+    """Builds the detector selected in settings. Falls back to Haar if a DNN model file is missing."""
+    name = name or settings.FACE_DETECTOR
+    min_face_size = settings.DETECTOR_MIN_FACE_SIZE
+    if name == "yunet":
+        path = settings.YUNET_MODEL_PATH or YUNET_MODEL_PATH
+        if os.path.exists(path):
+            return YuNetDetector(path, settings.DETECTOR_CONFIDENCE, min_face_size)
+        print(f"YuNet model not found at {path}, falling back to Haar cascade")
+    elif name == "res10":
+        prototxt = settings.RES10_PROTOTXT_PATH or RES10_PROTOTXT_PATH
+        model = settings.RES10_MODEL_PATH or RES10_MODEL_PATH
+        if os.path.exists(prototxt) and os.path.exists(model):
+            return Res10Detector(prototxt, model, settings.DETECTOR_CONFIDENCE, min_face_size)
+        print(f"res10 model not found at {model}, falling back to Haar cascade")
+    elif name != "haar":
+        print(f"Unknown FACE_DETECTOR '{name}', using Haar cascade")
+    return HaarDetector(settings.DETECTOR_SCALE_FACTOR, settings.DETECTOR_MIN_NEIGHBORS, min_face_size)
+
+# cv2.dnn networks are not thread-safe, so every executor thread gets its own detector
+_local = threading.local()
+
+def get_detector():
+    detector = getattr(_local, "detector", None)
+    if detector is None:
+        detector = _local.detector = create_detector()
+    return detector
@@ -0,0 +1,156 @@
+import cv2
+import numpy as np
+import os
+import threading
+import time
+
+from .config import settings
+from .batching import MicroBatcher
+from .onnx_runtime import create_onnx_session
+from .inference_client import is_remote_inference, get_inference_client
+from .result_cache import invalidate_result_cache
+from .metrics import record_model_load
+
+FACENET_INPUT_SIZE = (160, 160)
+# Produced by ml_model/scripts/export_facenet_onnx.py
+ONNX_MODEL_PATH = os.path.join(os.path.dirname(__file__), "../../ml_model/facenet.onnx")
+
+class DeepFaceEmbedder:
+    """Runs a DeepFace recognition model through TensorFlow/Keras."""
+
+    def __init__(self, model_name):
+        from deepface import DeepFace
+        client = DeepFace.build_model(model_name)
+        # DeepFace clients wrap the Keras model; older DeepFace versions return it directly
+        self.model = getattr(client, "model", client)
+        self.input_size = tuple(getattr(client, "input_shape", FACENET_INPUT_SIZE))
+
+    def predict(self, batch):
+        return np.asarray(self.model.predict_on_batch(batch), dtype=np.float32)
+
+class OnnxEmbedder:
+    """Runs the exported Facenet model through ONNX Runtime on CPU, without TensorFlow or DeepFace."""
+
+    def __init__(self, path):
+        self.session = create_onnx_session(path)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # NHWC with a dynamic batch dimension
+        height, width = model_input.shape[1:3]
+        self.input_size = (height, width) if isinstance(height, int) and isinstance(width, int) else FACENET_INPUT_SIZE
+
+    def predict(self, batch):
+        return np.asarray(self.session.run(None, {self.input_name: batch})[0], dtype=np.float32)
+
+# Loaded embedders, keyed by model name
+_models = {}
+_models_lock = threading.Lock()
+
+def load_embedding_model(model_name=None, backend=None):
+    """Builds the embedder for a model. Only the configured EMBEDDING_MODEL has an ONNX export."""
+    model_name = model_name or settings.EMBEDDING_MODEL
+    backend = backend or settings.EMBEDDING_BACKEND
+    start = time.perf_counter()
+    if backend == "onnx" and model_name == settings.EMBEDDING_MODEL:
+        path = settings.EMBEDDING_ONNX_PATH or ONNX_MODEL_PATH
+        model = OnnxEmbedder(path)
+        print(f"Embedding model {model_name} loaded successfully from {path} (onnx backend)")
+    else:
+        backend = "deepface"
+        model = DeepFaceEmbedder(model_name)
+        print(f"Embedding model {model_name} loaded successfully (deepface backend)")
+    record_model_load(f"embedding:{model_name}", backend, time.perf_counter() - start)
+    return model
+
+def get_embedding_model(model_name=None):
+    """Lazy load (and cache) the face recognition model."""
+    model_name = model_name or settings.EMBEDDING_MODEL
+    if model_name not in _models:
+        with _models_lock:
+            if model_name not in _models:
+                _models[model_name] = load_embedding_model(model_name)
+                invalidate_result_cache()
+    return _models[model_name]
+
+def get_input_size(model_name=None):
+    """(height, width) the recognition model expects."""
+    return get_embedding_model(model_name).input_size
+
+def preprocess_face(face_img, target_size=FACENET_INPUT_SIZE):
+    """
+    Reproduces what DeepFace.represent(..., detector_backend='skip') does to a BGR face crop:
+    BGR -> RGB, aspect-preserving resize, centered zero padding to the model input size,
+    and scaling to [0, 1].
+    """
+    img = cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)
+    factor = min(target_size[0] / img.shape[0], target_size[1] / img.shape[1])
+    img = cv2.resize(img, (int(img.shape[1] * factor), int(img.shape[0] * factor)))
+
+    # Put the resized face in the middle of the padded image
+    diff_0 = target_size[0] - img.shape[0]
+    diff_1 = target_size[1] - img.shape[1]
+    img = np.pad(
+        img,
+        ((diff_0 // 2, diff_0 - diff_0 // 2), (diff_1 // 2, diff_1 - diff_1 // 2), (0, 0)),
+        "constant",
+    )
+    if img.shape[0:2] != tuple(target_size):
+        img = cv2.resize(img, (target_size[1], target_size[0]))
+
+    img = img.astype(np.float32)
+    if img.max() > 1:
+        img /= 255.0
+    return img
+
+def compute_embeddings(face_batch, model_name=None):
+    """Runs one forward pass over a list of preprocessed faces. Returns an (N, dim) float32 array."""
+    return get_embedding_model(model_name).predict(np.stack(face_batch))
+
+def get_face_embeddings(face_imgs, model_name=None, batch_size=None):
+    """
+    Embeds many BGR face crops with as few forward passes as possible.
+    Returns an (N, dim) float32 array in input order. Meant for bulk paths; single
+    requests should go through get_face_embedding so they share the batching queue.
+    """
+    default_model = model_name is None or model_name == settings.EMBEDDING_MODEL
+    if is_remote_inference() and default_model:
+        return np.asarray(get_inference_client().embed_faces(face_imgs), dtype=np.float32)
+    target_size = get_input_size(model_name)
+    batch_size = batch_size or settings.EMBEDDING_MAX_BATCH_SIZE
+    faces = [preprocess_face(img, target_size) for img in face_imgs]
+    if not faces:
+        return np.empty((0, 128), dtype=np.float32)
+    chunks = [compute_embeddings(faces[i:i + batch_size], model_name) for i in range(0, len(faces), batch_size)]
+    return np.concatenate(chunks)
+
+# Shared coalescing queue: concurrent verify/enroll requests share forward passes
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_embedding_batcher():
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    "embedding",
+                    compute_embeddings,
+                    max_batch_size=settings.EMBEDDING_MAX_BATCH_SIZE,
+                    max_wait_ms=settings.EMBEDDING_MAX_WAIT_MS,
+                )
+    return _batcher
+
+def embed_face(face_img, model_name=None):
+    """Embeds a single BGR face crop. Returns a float32 vector."""
+    default_model = model_name is None or model_name == settings.EMBEDDING_MODEL
+    if is_remote_inference() and default_model:
+        return np.asarray(get_inference_client().embed_face(face_img), dtype=np.float32)
+    return embed_face_local(face_img, model_name)
+
+def embed_face_local(face_img, model_name=None):
+    """embed_face using the model loaded in this process."""
+    face = preprocess_face(face_img, get_input_size(model_name))
+    default_model = model_name is None or model_name == settings.EMBEDDING_MODEL
+    if settings.EMBEDDING_BATCHING and default_model:
+        return get_embedding_batcher().submit(face).result()
+    return compute_embeddings([face], model_name)[0]
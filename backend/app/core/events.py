@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from collections import deque
+
+
+class Subscription:
+    """
+    One live subscriber with a bounded buffer. When a slow client falls behind, the oldest
+    events are discarded (and counted), so publishers never wait on subscribers.
+    """
+
+    def __init__(self, loop, max_buffer):
+        self.loop = loop
+        self._buffer = deque(maxlen=max_buffer)
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def _push(self, event):
+        # Runs on the subscriber's event loop
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(event)
+        self._ready.set()
+
+    async def get(self):
+        while not self._buffer:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._buffer.popleft()
+
+
+class EventBroker:
+    """Fans access events out to live subscribers (e.g. the admin log stream)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self, max_buffer=100):
+        """Must be called from the event loop the subscriber will read on."""
+        subscription = Subscription(asyncio.get_running_loop(), max_buffer)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        """Thread-safe and non-blocking: callable from request threads and the executor."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._push, event)
+            except RuntimeError:
+                # The subscriber's loop is closed
+                self.unsubscribe(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+_broker = EventBroker()
+
+
+def get_event_broker():
+    return _broker
@@ -0,0 +1,87 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+
+from .config import settings
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for the CPU-bound request pipeline (decode, detection, inference, DB).
+    At most `max_workers` jobs run at once and at most `queue_size` more may wait. Beyond
+    that, callers are rejected immediately instead of piling up behind the event loop.
+    """
+
+    def __init__(self, max_workers, queue_size):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def try_submit(self, fn, *args, **kwargs):
+        """Returns a concurrent Future, or None if the executor is saturated."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            return None
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        # Free the slot when the job really finishes, even if the client went away meanwhile
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs fn in the pool without blocking the event loop. Raises 503 when saturated."""
+        # Carry the request context (request ID, stage timings) into the worker thread
+        context = contextvars.copy_context()
+        future = self.try_submit(context.run, functools.partial(fn, *args, **kwargs))
+        if future is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        return await asyncio.wrap_future(future)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "max_workers": self.max_workers,
+                "queue_size": self.queue_size,
+                "rejected": self._rejected,
+            }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = InferenceExecutor(settings.INFERENCE_WORKERS, settings.INFERENCE_QUEUE_SIZE)
+    return _executor
+
+
+async def run_in_executor(fn, *args, **kwargs):
+    """Shortcut used by the routers: run a blocking pipeline on the shared bounded executor."""
+    return await get_executor().run(fn, *args, **kwargs)
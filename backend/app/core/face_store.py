@@ -0,0 +1,151 @@
+"""
+Content-addressed store for the reference face crops shown in the admin dashboard.
+
+Each image is stored once under the sha256 of its JPEG bytes, next to a precomputed
+thumbnail: data/faces/objects/ab/<hash>.jpg and <hash>_thumb.jpg. Users reference images
+by hash (users.image_hash), so identical names can no longer overwrite each other's files
+and the files never change, which lets /api/faces serve them as immutable.
+"""
+import hashlib
+import os
+import re
+import uuid
+
+from .config import settings
+
+# Legacy per-name images (data/faces/<safe name>.jpg, served at /static/faces)
+FACES_DIR = "data/faces"
+OBJECTS_DIR = os.path.join(FACES_DIR, "objects")
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def safe_filename(name):
+    """User name reduced to characters that are safe in a file name."""
+    return "".join([c for c in name if c.isalnum() or c in (' ', '-', '_')]).strip()
+
+
+def legacy_image_path(name):
+    return os.path.join(FACES_DIR, f"{safe_filename(name)}.jpg")
+
+
+def is_valid_hash(image_hash):
+    return bool(image_hash) and _HASH_RE.match(image_hash) is not None
+
+
+def face_image_path(image_hash, thumbnail=False):
+    """Path of a stored image (or its thumbnail). Raises ValueError for malformed hashes."""
+    if not is_valid_hash(image_hash):
+        raise ValueError("Invalid image hash")
+    suffix = "_thumb" if thumbnail else ""
+    return os.path.join(OBJECTS_DIR, image_hash[:2], f"{image_hash}{suffix}.jpg")
+
+
+def _write_atomic(path, data):
+    # Readers never see a partial file: write aside, then rename into place
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def make_thumbnail(image):
+    """Downscales so the longer side is FACE_THUMBNAIL_SIZE pixels (never upscales)."""
+    import cv2
+    h, w = image.shape[:2]
+    scale = settings.FACE_THUMBNAIL_SIZE / max(h, w)
+    if scale >= 1.0:
+        return image
+    return cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def store_jpeg_bytes(data, image=None):
+    """Stores already-encoded JPEG bytes (+ thumbnail). Returns the content hash."""
+    import cv2
+    import numpy as np
+    image_hash = hashlib.sha256(data).hexdigest()
+    path = face_image_path(image_hash)
+    thumb_path = face_image_path(image_hash, thumbnail=True)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    if not os.path.exists(thumb_path):
+        if image is None:
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        ok, thumb = cv2.imencode(".jpg", make_thumbnail(image), [cv2.IMWRITE_JPEG_QUALITY, settings.FACE_THUMBNAIL_JPEG_QUALITY])
+        if not ok:
+            raise ValueError("Could not encode thumbnail")
+        _write_atomic(thumb_path, thumb.tobytes())
+    return image_hash
+
+
+def encode_face_image(image):
+    """
+    Encodes a reference image (BGR array) as JPEG. Returns (content hash, JPEG bytes), or
+    None (and logs) on failure; enrollment does not fail over it. Nothing is written yet:
+    callers commit users.image_hash first and call write_face_image afterwards, so a
+    rolled-back enrollment never leaves an orphaned file behind.
+    """
+    import cv2
+    try:
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, settings.FACE_IMAGE_JPEG_QUALITY])
+        if not ok:
+            raise ValueError("Could not encode image")
+        data = encoded.tobytes()
+        return hashlib.sha256(data).hexdigest(), data
+    except Exception as e:
+        print(f"Failed to encode reference image: {e}")
+        return None
+
+
+def write_face_image(data, image=None):
+    """Stores the JPEG bytes from encode_face_image (+ thumbnail) after the commit. Logs failures."""
+    try:
+        store_jpeg_bytes(data, image)
+    except Exception as e:
+        print(f"Failed to save reference image: {e}")
+
+
+def delete_face_image(image_hash):
+    """Removes a stored image and its thumbnail."""
+    for thumbnail in (False, True):
+        path = face_image_path(image_hash, thumbnail)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def delete_legacy_face_image(name):
+    path = legacy_image_path(name)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def release_face_image(db, image_hash):
+    """
+    Deletes a stored image once no user references it any more (images are shared by content).
+    The reference check and the unlink run in one transaction that holds the gallery_state
+    row lock, which every enrollment commit also takes (bump_gallery_version). Enrollments
+    write their file only after committing, so one committing the same image meanwhile
+    either is seen here or writes the file again afterwards.
+    """
+    from app.db import models
+    if not is_valid_hash(image_hash):
+        return
+    state = models.GalleryState
+    try:
+        # No-op update: a write lock on SQLite, a row lock elsewhere
+        db.query(state).filter(state.id == 1).update({state.version: state.version}, synchronize_session=False)
+        if db.query(models.User.id).filter(models.User.image_hash == image_hash).first() is None:
+            delete_face_image(image_hash)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Failed to delete reference image {image_hash}: {e}")
+
+
+def image_urls(name, image_hash):
+    """(image_url, thumbnail_url) for a user; users enrolled before the store keep their legacy file."""
+    if image_hash:
+        return f"/api/faces/{image_hash}", f"/api/faces/{image_hash}/thumb"
+    legacy_url = f"/static/faces/{safe_filename(name)}.jpg"
+    return legacy_url, legacy_url
@@ -1,131 +1,265 @@
 import base64
 import cv2
 import numpy as np
-from deepface import DeepFace
 import os
-from .liveness_utils import check_liveness as perform_liveness_check
+from .config import settings
+from .liveness_utils import check_liveness as perform_liveness_check, predict_liveness
+from .detectors import get_detector
+from .gallery import normalize_embeddings
+from .embedding_utils import embed_face
+from .result_cache import FaceAnalysis, content_key, face_dhash, get_result_cache
+from .metrics import stage
 
-# Global cache for Haar Cascade to prevent redundant Disk I/O
-_face_cascade = None
-
-def get_face_cascade():
-    global _face_cascade
-    if _face_cascade is None:
-        _face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-    return _face_cascade
+def decode_base64(base64_string: str):
+    """Decodes a base64 string (optionally a data URL) into the encoded image bytes."""
+    try:
+        # Remove header if present
+        if "," in base64_string:
+            base64_string = base64_string.split(",", 1)[1]
+        return base64.b64decode(base64_string)
+    except Exception as e:
+        print(f"Error decoding image: {e}")
+        return None
 
 def decode_image(base64_string: str):
     """Decodes a base64 string into an OpenCV image."""
+    encoded_data = decode_base64(base64_string)
+    if encoded_data is None:
+        return None
+    return decode_image_bytes(encoded_data)
+
+# SOF markers carry the frame size (all 0xC0-0xCF except DHT, JPG and DAC)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def jpeg_size(data):
+    """Reads (height, width) from a JPEG header without decoding it. Returns None for other formats."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Markers without a payload
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return height, width
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+_REDUCED_DECODE_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+def decode_image_bytes(data):
+    """
+    Decodes raw JPEG/PNG bytes into an OpenCV image.
+    The bytes are wrapped without copying. Large JPEGs are decoded directly at 1/2, 1/4 or
+    1/8 scale (done inside libjpeg, much cheaper than a full decode + resize) as long as the
+    result stays at least as large as the detection size extract_face downsizes to anyway.
+    """
     try:
-        # Remove header if present
-        if "," in base64_string:
-            base64_string = base64_string.split(",")[1]
-        
-        encoded_data = base64.b64decode(base64_string)
-        nparr = np.frombuffer(encoded_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        return img
+        nparr = np.frombuffer(data, np.uint8)
+        flags = cv2.IMREAD_COLOR
+        if settings.DECODE_REDUCED_JPEG:
+            size = jpeg_size(data)
+            if size is not None:
+                for factor, reduced_flags in _REDUCED_DECODE_FLAGS:
+                    if max(size) // factor >= settings.DETECTION_MAX_DIM:
+                        flags = reduced_flags
+                        break
+        return cv2.imdecode(nparr, flags)
     except Exception as e:
         print(f"Error decoding image: {e}")
         return None
 
+def detect_face(image):
+    """Finds the largest face in an image. Returns its (x, y, w, h) box in image coordinates, or None."""
+    if image is None: return None
+    
+    # Performance optimization: Downscale image if it's too large
+    # This makes face detection much faster
+    height, width = image.shape[:2]
+    max_dim = settings.DETECTION_MAX_DIM
+    scale = 1.0
+    if max(height, width) > max_dim:
+        scale = max_dim / max(height, width)
+        small_img = cv2.resize(image, (int(width * scale), int(height * scale)))
+    else:
+        small_img = image
+
+    # Detect on the smaller image with the configured detector (Haar, YuNet or res10)
+    faces = get_detector().detect(small_img)
+    
+    if len(faces) == 0:
+        return None
+        
+    # Pick the largest face and rescale coordinates back
+    x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+    return int(x / scale), int(y / scale), int(w / scale), int(h / scale)
+
+def crop_face(image, box):
+    """Crops a face box with 20% padding from the (original, high-res) image."""
+    x, y, w, h = box
+    # Add padding (working on original high-res image for better embedding)
+    padding_w = int(0.2 * w)
+    padding_h = int(0.2 * h)
+    y1 = max(0, y - padding_h)
+    y2 = min(image.shape[0], y + h + padding_h)
+    x1 = max(0, x - padding_w)
+    x2 = min(image.shape[1], x + w + padding_w)
+    
+    return image[y1:y2, x1:x2]
+
 def extract_face(image):
     """Detects and crops the face from an image. Optimized for speed."""
     try:
-        if image is None: return None
-        
-        # Performance optimization: Downscale image if it's too large
-        # This makes Haar Cascade detection much faster
-        height, width = image.shape[:2]
-        max_dim = 640
-        scale = 1.0
-        if max(height, width) > max_dim:
-            scale = max_dim / max(height, width)
-            small_img = cv2.resize(image, (int(width * scale), int(height * scale)))
-        else:
-            small_img = image
-
-        # Use cached Haar Cascade
-        face_cascade = get_face_cascade()
-        gray = cv2.cvtColor(small_img, cv2.COLOR_BGR2GRAY)
-        
-        # Detect on the smaller image
-        faces = face_cascade.detectMultiScale(gray, 1.1, 4)
-        
-        if len(faces) == 0:
+        box = detect_face(image)
+        if box is None:
             return None
-            
-        # Pick the largest face and rescale coordinates back
-        x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
-        x, y, w, h = int(x / scale), int(y / scale), int(w / scale), int(h / scale)
-        
-        # Add padding (working on original high-res image for better embedding)
-        padding_w = int(0.2 * w)
-        padding_h = int(0.2 * h)
-        y1 = max(0, y - padding_h)
-        y2 = min(image.shape[0], y + h + padding_h)
-        x1 = max(0, x - padding_w)
-        x2 = min(image.shape[1], x + w + padding_w)
-        
-        return image[y1:y2, x1:x2]
+        return crop_face(image, box)
     except Exception as e:
         print(f"Error extracting face: {e}")
         return None
 
-def get_face_embedding(image, model_name="Facenet"):
+def get_face_embedding(image, model_name=None):
     """
-    Extracts face embedding using DeepFace.
-    We pass detector_backend='skip' because we've already extracted/cropped the face.
-    This provides a massive speedup as it bypasses an entire neural network pass.
+    Extracts face embedding with the DeepFace recognition model (Facenet by default).
+    The input is assumed to be an already-cropped face (DeepFace's detector_backend='skip'),
+    which bypasses an entire detection network pass. Single requests go through a shared
+    batching queue, so concurrent verify/enroll calls share forward passes.
     """
     try:
-        # 'skip' is the fastest as it assumes the input IS the face
-        embeddings = DeepFace.represent(
-            img_path=image, 
-            model_name=model_name, 
-            enforce_detection=False,
-            detector_backend='skip'
-        )
-        if embeddings:
-            return embeddings[0]["embedding"]
+        embedding = embed_face(image, model_name)
+        if embedding is not None:
+            return embedding.tolist()
         return None
     except Exception as e:
         print(f"Error extracting embedding: {e}")
         return None
 
-def preload_models():
-    """Pre-loads DeepFace models and Liveness model into memory."""
+def analyze_face(face_img):
+    """Liveness, then (for live faces) the embedding of a face crop."""
+    is_live, confidence, embedding, _ = _analyze_face(face_img)
+    return is_live, confidence, embedding
+
+def _analyze_face(face_img):
+    """analyze_face plus whether a model call failed (its fail-secure result must not be cached)."""
+    failed = False
+    with stage("liveness"):
+        try:
+            is_live, confidence = predict_liveness(face_img)
+        except Exception as e:
+            print(f"Error during liveness check: {e}")
+            # Fail-secure: deny this attempt, but let a retry run the model again
+            is_live, confidence, failed = False, 0.0, True
+    embedding = None
+    if is_live:
+        with stage("embedding"):
+            embedding, failed = _embed(face_img)
+    return is_live, confidence, embedding, failed
+
+def _embed(image):
+    """(embedding list, failed) for a face crop or frame."""
+    try:
+        embedding = embed_face(image)
+    except Exception as e:
+        print(f"Error extracting embedding: {e}")
+        return None, True
+    if embedding is None:
+        return None, True
+    return embedding.tolist(), False
+
+def analyze_image(data, with_image=False):
+    """
+    Decode -> detect -> liveness -> embedding for an encoded image, as a FaceAnalysis.
+    Returns None for undecodable data. Results are cached by content hash, so a retried or
+    re-sent frame skips the models (and concurrent identical requests share one run);
+    results of a failed model call are not cached, so the retry runs them again.
+
+    with_image=True returns (analysis, image): the face crop (the frame when no face was
+    found) if this call decoded the image, None on a cache hit. The image is handed to the
+    caller only and never cached.
+    """
+    cache = get_result_cache()
+    decoded = {}
+
+    def compute():
+        analysis, decoded["image"] = _analyze_image(data, cache)
+        return analysis
+
+    analysis = cache.get_or_compute(
+        ("image", content_key(data)),
+        compute,
+        cacheable=lambda analysis: analysis is None or not analysis.failed,
+    )
+    if with_image:
+        return analysis, decoded.get("image")
+    return analysis
+
+def reference_image(data, analysis):
+    """Face crop (or frame) of an analyzed image, decoding it again (after a cache hit)."""
+    img = decode_image_bytes(data)
+    if img is None or analysis.box is None:
+        return img
+    return crop_face(img, analysis.box)
+
+def _analyze_image(data, cache):
+    """(FaceAnalysis, face crop or frame); (None, None) for undecodable data."""
+    with stage("decode"):
+        img = decode_image_bytes(data)
+    if img is None:
+        return None, None
+    detect_failed = False
     try:
-        print("Pre-loading models for faster first-response...")
-        # Pre-load Facenet
-        DeepFace.build_model("Facenet")
-        # Trigger liveness model load
-        from .liveness_utils import get_liveness_model
-        get_liveness_model()
-        print("Models successfully cached in memory.")
+        with stage("detect"):
+            box = detect_face(img)
     except Exception as e:
-        print(f"Error pre-loading models: {e}")
+        print(f"Error extracting face: {e}")
+        box, detect_failed = None, True
+    if box is None:
+        # No face found: fall back to embedding the whole frame, without liveness
+        with stage("embedding"):
+            embedding, failed = _embed(img)
+        return FaceAnalysis(None, None, None, embedding, failed or detect_failed), img
+
+    face_img = crop_face(img, box)
+    if settings.RESULT_CACHE_FACE_HASH:
+        key = ("face", face_dhash(face_img))
+        result = cache.get_or_compute(key, lambda: _analyze_face(face_img), cacheable=lambda r: not r[3])
+    else:
+        result = _analyze_face(face_img)
+    return FaceAnalysis(box, *result), face_img
+
+def preload_models():
+    """
+    Loads the liveness and embedding models (or connects to the inference server) and warms
+    them up with dummy inferences, so the first real request is not slow. Returns True when ready.
+    """
+    from .readiness import get_readiness
+    print("Pre-loading models for faster first-response...")
+    return get_readiness().run()
 
 def verify_face(probe_embedding, registered_embeddings, threshold=0.4):
     """
     Compares a probe embedding against a list of registered embeddings.
     Returns the index of the best match if it's below the threshold, otherwise None.
     """
-    if not registered_embeddings:
+    if len(registered_embeddings) == 0:
         return None, 1.0
 
-    probe_embedding = np.array(probe_embedding)
-    best_dist = 1.0
-    best_idx = -1
-
-    for i, reg_emb in enumerate(registered_embeddings):
-        reg_emb = np.array(reg_emb)
-        # Cosine distance
-        dist = 1 - (np.dot(probe_embedding, reg_emb) / (np.linalg.norm(probe_embedding) * np.linalg.norm(reg_emb)))
-        if dist < best_dist:
-            best_dist = dist
-            best_idx = i
+    # Vectorized cosine distance against every registered embedding at once
+    probe = normalize_embeddings(probe_embedding)
+    distances = 1.0 - normalize_embeddings(registered_embeddings) @ probe
+    best_idx = int(np.argmin(distances))
+    best_dist = min(float(distances[best_idx]), 1.0)
 
     if best_dist < threshold:
-        return best_idx, float(best_dist)
-    return None, float(best_dist)
+        return best_idx, best_dist
+    return None, best_dist
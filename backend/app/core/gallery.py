@@ -0,0 +1,439 @@
+import threading
+import time
+import numpy as np
+
+from app.db import models
+from app.db.database import SessionLocal
+from app.db.embeddings import decode_embedding_matrix
+from app.core.config import settings
+
+EMBEDDING_DIM = 128
+
+
+def normalize_embeddings(embeddings):
+    """L2-normalizes a single embedding or a stack of embeddings as float32."""
+    arr = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    # Guard against all-zero vectors so they never produce NaN distances
+    norms[norms == 0] = 1.0
+    return arr / norms
+
+
+class GalleryIndex:
+    """
+    In-memory index of every enrolled face embedding.
+    Embeddings are kept pre-normalized in one contiguous float32 matrix, so matching a
+    probe is a single matrix-vector product instead of a Python loop over JSON rows.
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._matrix = np.empty((0, dim), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._rows = {}  # user_id -> row in the matrix
+        self._size = 0
+        self.loaded = False
+        # Shared gallery version (gallery_state) this index reflects
+        self.version = None
+
+    def __len__(self):
+        return self._size
+
+    def rebuild(self, user_ids, embeddings):
+        """Replaces the whole index with the given users."""
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        if len(user_ids):
+            matrix = normalize_embeddings(embeddings).reshape(len(user_ids), self.dim)
+        else:
+            matrix = np.empty((0, self.dim), dtype=np.float32)
+        with self._lock:
+            self._matrix = np.ascontiguousarray(matrix)
+            self._ids = user_ids.copy()
+            self._rows = {int(uid): i for i, uid in enumerate(user_ids)}
+            self._size = len(user_ids)
+            self.loaded = True
+
+    def add(self, user_id, embedding):
+        """Inserts a user, or replaces their embedding if they are already indexed."""
+        vec = normalize_embeddings(embedding).reshape(self.dim)
+        user_id = int(user_id)
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is not None:
+                self._matrix[row] = vec
+                return
+            if self._size == len(self._matrix):
+                # Grow geometrically so repeated enrollments stay amortized O(1)
+                capacity = max(16, 2 * len(self._matrix))
+                matrix = np.empty((capacity, self.dim), dtype=np.float32)
+                matrix[:self._size] = self._matrix[:self._size]
+                ids = np.empty(capacity, dtype=np.int64)
+                ids[:self._size] = self._ids[:self._size]
+                self._matrix, self._ids = matrix, ids
+            self._matrix[self._size] = vec
+            self._ids[self._size] = user_id
+            self._rows[user_id] = self._size
+            self._size += 1
+
+    def remove(self, user_id):
+        """Drops a user from the index. Unknown ids are ignored."""
+        user_id = int(user_id)
+        with self._lock:
+            row = self._rows.pop(user_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                # Move the last row into the hole to keep the matrix dense
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = self._ids[last]
+                self._rows[int(self._ids[row])] = row
+            self._size = last
+
+    def search(self, probe_embedding, threshold=0.4):
+        """
+        Finds the closest enrolled user by cosine distance.
+        Returns (user_id, distance) if the best distance is below the threshold,
+        otherwise (None, distance). Mirrors the contract of verify_face.
+        """
+        probe = normalize_embeddings(probe_embedding).reshape(self.dim)
+        best_id, best_dist = self._nearest(probe)
+        best_dist = min(best_dist, 1.0)
+        if best_id is not None and best_dist < threshold:
+            return best_id, best_dist
+        return None, best_dist
+
+    def _nearest(self, probe):
+        """Exact nearest neighbour of a normalized probe as (user_id, distance)."""
+        with self._lock:
+            if self._size == 0:
+                return None, 1.0
+            # Rows are unit vectors, so cosine distance = 1 - dot product
+            distances = 1.0 - self._matrix[:self._size] @ probe
+            best_row = int(np.argmin(distances))
+            return int(self._ids[best_row]), float(distances[best_row])
+
+
+def spherical_kmeans(vectors, k, iterations=10, seed=0, chunk_size=16384):
+    """Clusters unit vectors by cosine similarity. Returns (k, dim) unit centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = assign_clusters(vectors, centroids, chunk_size)
+        counts = np.bincount(assign, minlength=k)
+        # Sum members per cluster in one pass over the vectors sorted by cluster
+        order = np.argsort(assign, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.zeros_like(centroids)
+        sums[counts > 0] = np.add.reduceat(vectors[order], starts[counts > 0], axis=0)
+        # Re-seed empty clusters with random points so no list goes unused
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+        centroids = normalize_embeddings(sums)
+    return centroids
+
+
+def assign_clusters(vectors, centroids, chunk_size=16384):
+    """Index of the most similar centroid for each vector, computed in chunks to bound memory."""
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        assign[start:start + chunk_size] = np.argmax(vectors[start:start + chunk_size] @ centroids.T, axis=1)
+    return assign
+
+
+class IVFGalleryIndex(GalleryIndex):
+    """
+    Approximate gallery index for very large sites (inverted file, NumPy only).
+    Embeddings are partitioned by spherical k-means into `nlist` inverted lists, each an
+    exact GalleryIndex. A probe is only compared against the `nprobe` closest lists, so the
+    cost grows with N / nlist * nprobe instead of N. Small galleries (fewer than
+    `min_train_size` identities) fall back to a single list, i.e. exact search.
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM, nlist=0, nprobe=8, min_train_size=10_000, seed=0):
+        super().__init__(dim)
+        self.nlist = nlist  # 0 picks sqrt(N) at training time
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.seed = seed
+        self._centroids = np.zeros((1, dim), dtype=np.float32)
+        self._lists = [GalleryIndex(dim)]
+        self._owner = {}  # user_id -> inverted list number
+        self._trained_size = 0
+        # Changes made while a retrain runs outside the lock, replayed when it is swapped in
+        self._journal = None
+        # Bumped by every rebuild/retrain so a superseded retrain never swaps in
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._owner)
+
+    def rebuild(self, user_ids, embeddings):
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        if len(user_ids):
+            vectors = normalize_embeddings(embeddings).reshape(len(user_ids), self.dim)
+        else:
+            vectors = np.empty((0, self.dim), dtype=np.float32)
+        with self._lock:
+            centroids, trained_size = self._centroids, self._trained_size
+        if not (len(centroids) > 1 and self.min_train_size <= len(user_ids) < 2 * trained_size):
+            # Nothing to reuse, or the gallery outgrew the partition: train a new one
+            centroids, trained_size = None, len(user_ids)
+        partition = self._partition(user_ids, vectors, centroids, trained_size)
+        with self._lock:
+            self._install(*partition)
+            self._generation += 1
+            # A retrain still running is superseded by this state
+            self._journal = None
+            self.loaded = True
+
+    def _partition(self, user_ids, vectors, centroids=None, trained_size=None):
+        """
+        Fills the inverted lists, training the centroids first unless existing ones are
+        given (a reload then only re-assigns vectors). Runs without holding the lock.
+        """
+        if centroids is not None:
+            assign = assign_clusters(vectors, centroids)
+        elif len(user_ids) >= max(1, self.min_train_size):
+            nlist = self.nlist or int(np.sqrt(len(user_ids)))
+            centroids = spherical_kmeans(vectors, min(nlist, len(user_ids)), seed=self.seed)
+            assign = assign_clusters(vectors, centroids)
+        else:
+            centroids = np.zeros((1, self.dim), dtype=np.float32)
+            assign = np.zeros(len(user_ids), dtype=np.int64)
+
+        lists = []
+        for list_no in range(len(centroids)):
+            members = assign == list_no
+            inverted_list = GalleryIndex(self.dim)
+            inverted_list.rebuild(user_ids[members], vectors[members])
+            lists.append(inverted_list)
+        owner = {int(uid): int(list_no) for uid, list_no in zip(user_ids, assign)}
+        return centroids, lists, owner, len(user_ids) if trained_size is None else trained_size
+
+    def _install(self, centroids, lists, owner, trained_size):
+        self._centroids = centroids
+        self._lists = lists
+        self._owner = owner
+        self._trained_size = trained_size
+
+    def add(self, user_id, embedding):
+        vec = normalize_embeddings(embedding).reshape(self.dim)
+        user_id = int(user_id)
+        with self._lock:
+            self._add_locked(user_id, vec)
+            if self._journal is not None:
+                self._journal.append((user_id, vec))
+                return
+            if len(self._owner) < max(self.min_train_size, 2 * self._trained_size):
+                return
+            # The partition was trained on a much smaller gallery; retrain it in the
+            # background, so neither this enrollment nor concurrent searches wait for k-means
+            self._journal = []
+            self._generation += 1
+            generation = self._generation
+            ids, vectors = self._snapshot()
+        threading.Thread(
+            target=self._retrain, args=(generation, ids, vectors), name="gallery-retrain", daemon=True
+        ).start()
+
+    def _add_locked(self, user_id, vec):
+        list_no = int(np.argmax(self._centroids @ vec))
+        previous = self._owner.get(user_id)
+        if previous is not None and previous != list_no:
+            self._lists[previous].remove(user_id)
+        self._lists[list_no].add(user_id, vec)
+        self._owner[user_id] = list_no
+
+    def remove(self, user_id):
+        user_id = int(user_id)
+        with self._lock:
+            self._remove_locked(user_id)
+            if self._journal is not None:
+                self._journal.append((user_id, None))
+
+    def _remove_locked(self, user_id):
+        list_no = self._owner.pop(user_id, None)
+        if list_no is not None:
+            self._lists[list_no].remove(user_id)
+
+    def _snapshot(self):
+        """Copies of every indexed id and vector (caller holds the lock)."""
+        ids, vectors = [], []
+        for inverted_list in self._lists:
+            size = len(inverted_list)
+            ids.append(inverted_list._ids[:size])
+            vectors.append(inverted_list._matrix[:size])
+        return np.concatenate(ids), np.concatenate(vectors)
+
+    def _retrain(self, generation, ids, vectors):
+        try:
+            partition = self._partition(ids, vectors)
+        except Exception as e:
+            print(f"Gallery retrain failed: {e}")
+            with self._lock:
+                if generation == self._generation:
+                    self._journal = None
+            return
+        with self._lock:
+            if generation != self._generation:
+                # A rebuild (or a newer retrain) replaced the index meanwhile
+                return
+            journal, self._journal = self._journal, None
+            self._install(*partition)
+            for user_id, vec in journal:
+                if vec is None:
+                    self._remove_locked(user_id)
+                else:
+                    self._add_locked(user_id, vec)
+
+    def _nearest(self, probe):
+        with self._lock:
+            nprobe = min(self.nprobe, len(self._centroids))
+            closest = np.argpartition(-(self._centroids @ probe), nprobe - 1)[:nprobe]
+            best_id, best_dist = None, 1.0
+            for list_no in closest:
+                user_id, dist = self._lists[list_no]._nearest(probe)
+                if user_id is not None and (best_id is None or dist < best_dist):
+                    best_id, best_dist = user_id, dist
+            return best_id, best_dist
+
+
+# Process-wide gallery shared by all requests
+_gallery = None
+_gallery_lock = threading.RLock()
+
+
+def get_gallery():
+    global _gallery
+    if _gallery is None:
+        with _gallery_lock:
+            if _gallery is None:
+                _gallery = create_gallery_index()
+    return _gallery
+
+
+def create_gallery_index():
+    """Builds an empty index of the kind selected by settings.GALLERY_INDEX."""
+    if settings.GALLERY_INDEX == "ivf":
+        return IVFGalleryIndex(
+            nlist=settings.GALLERY_IVF_NLIST,
+            nprobe=settings.GALLERY_IVF_NPROBE,
+            min_train_size=settings.GALLERY_IVF_MIN_TRAIN_SIZE,
+        )
+    if settings.GALLERY_INDEX != "exact":
+        print(f"Unknown GALLERY_INDEX '{settings.GALLERY_INDEX}', using exact search.")
+    return GalleryIndex()
+
+
+def get_gallery_version(db):
+    """Current shared gallery version (bumped by every enrollment and deletion)."""
+    return db.query(models.GalleryState.version).filter(models.GalleryState.id == 1).scalar() or 0
+
+
+def bump_gallery_version(db):
+    """
+    Marks the enrolled users as changed for every process, in the caller's transaction
+    (the caller commits). Returns the new version.
+    """
+    state = models.GalleryState
+    updated = db.query(state).filter(state.id == 1).update({state.version: state.version + 1}, synchronize_session=False)
+    if not updated:
+        db.add(state(id=1, version=1))
+        db.flush()
+    return get_gallery_version(db)
+
+
+def note_local_change(version):
+    """
+    Called after this process applied its own committed change (add/remove) to the gallery.
+    If that change is the only one since the last sync, the gallery is current at `version`
+    and the next sync does not need a reload.
+    """
+    gallery = get_gallery()
+    with _gallery_lock:
+        if gallery.version is not None and gallery.version == version - 1:
+            gallery.version = version
+
+
+def load_gallery(db):
+    """(Re)builds the process-wide gallery from the users table."""
+    # Read before the rows: a change committed in between only causes one more reload
+    version = get_gallery_version(db)
+    rows = (
+        db.query(models.User.id, models.User.face_embedding, models.User.embedding_dim, models.User.embedding_dtype)
+        .filter(models.User.embedding_model == settings.EMBEDDING_MODEL)
+        .all()
+    )
+    # Blobs go straight into NumPy; rows are grouped in case precisions were mixed over time
+    groups = {}
+    for user_id, blob, dim, dtype in rows:
+        group = groups.setdefault((dim, dtype), ([], []))
+        group[0].append(user_id)
+        group[1].append(blob)
+
+    gallery = get_gallery()
+    user_ids, matrices = [], []
+    for (dim, dtype), (ids, blobs) in groups.items():
+        if dim != gallery.dim:
+            print(f"Skipping {len(ids)} embeddings with dimension {dim} (expected {gallery.dim}).")
+            continue
+        user_ids.extend(ids)
+        matrices.append(decode_embedding_matrix(blobs, dim, dtype))
+    embeddings = np.concatenate(matrices) if matrices else np.empty((0, gallery.dim), dtype=np.float32)
+    gallery.rebuild(user_ids, embeddings)
+    gallery.version = version
+    print(f"Gallery index built with {len(gallery)} identities.")
+    return gallery
+
+
+def ensure_gallery_loaded(db):
+    """Builds the gallery on first use if startup did not do it already."""
+    gallery = get_gallery()
+    if not gallery.loaded:
+        with _gallery_lock:
+            if not gallery.loaded:
+                load_gallery(db)
+    return gallery
+
+
+_next_sync = 0.0
+_reload_lock = threading.Lock()
+
+
+def sync_gallery(db):
+    """
+    ensure_gallery_loaded plus a staleness check: every GALLERY_SYNC_INTERVAL_S the shared
+    gallery version is read (one primary-key lookup), and if another worker or the bulk
+    enrollment CLI changed the users, a background reload is started. Requests keep
+    searching the current index until the reloaded one is swapped in.
+    """
+    global _next_sync
+    gallery = ensure_gallery_loaded(db)
+    now = time.monotonic()
+    if now < _next_sync:
+        return gallery
+    _next_sync = now + settings.GALLERY_SYNC_INTERVAL_S
+    if get_gallery_version(db) != gallery.version:
+        start_background_reload()
+    return gallery
+
+
+def start_background_reload():
+    """Reloads the gallery in a background thread, unless a reload is already running."""
+    if not _reload_lock.acquire(blocking=False):
+        return False
+
+    def reload():
+        try:
+            with SessionLocal() as db:
+                load_gallery(db)
+        except Exception as e:
+            print(f"Gallery reload failed: {e}")
+        finally:
+            _reload_lock.release()
+
+    threading.Thread(target=reload, name="gallery-reload", daemon=True).start()
+    return True
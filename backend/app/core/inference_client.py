@@ -0,0 +1,128 @@
+import os
+import queue
+import secrets
+import sys
+import tempfile
+import threading
+from multiprocessing.connection import Client
+
+from .config import settings
+
+
+def get_server_address():
+    """Local IPC address of the shared inference server: a Unix socket, or a named pipe on Windows."""
+    if settings.INFERENCE_SERVER_ADDRESS:
+        return settings.INFERENCE_SERVER_ADDRESS
+    if sys.platform == "win32":
+        return r"\\.\pipe\face-access-inference"
+    return os.path.join(tempfile.gettempdir(), "face-access-inference.sock")
+
+
+# multiprocessing.connection unpickles everything it receives; only a secret key keeps other
+# local processes from running code in the server (and the handshake authenticates both ways)
+MIN_AUTHKEY_BYTES = 16
+
+
+def get_authkey(create=False):
+    """
+    Handshake key: INFERENCE_SERVER_AUTHKEY if set, otherwise the key file, which the
+    server creates on first start (create=True). Raises RuntimeError if no usable key exists.
+    """
+    if settings.INFERENCE_SERVER_AUTHKEY:
+        key = settings.INFERENCE_SERVER_AUTHKEY.encode()
+    else:
+        key = _read_key_file(settings.INFERENCE_SERVER_AUTHKEY_FILE, create)
+    if len(key) < MIN_AUTHKEY_BYTES:
+        raise RuntimeError(f"Inference server authkey must be at least {MIN_AUTHKEY_BYTES} bytes")
+    return key
+
+
+def _read_key_file(path, create):
+    if create and not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            # Another server instance created it meanwhile
+            pass
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+    if not os.path.exists(path):
+        raise RuntimeError(
+            f"No inference server key at {path}: start the inference server first or set INFERENCE_SERVER_AUTHKEY"
+        )
+    if sys.platform != "win32":
+        st = os.stat(path)
+        if st.st_uid != os.getuid() or st.st_mode & 0o077:
+            raise RuntimeError(f"Refusing inference server key {path}: it must be owned by this user with mode 0600")
+    with open(path) as f:
+        return f.read().strip().encode()
+
+
+class InferenceClient:
+    """
+    Talks to the shared inference server (app/core/inference_server.py) from an HTTP worker.
+    Keeps a small pool of connections so concurrent requests of this worker do not wait on
+    each other; the server batches them together with requests from the other workers.
+    """
+
+    def __init__(self, address, authkey, max_idle_connections=8):
+        self.address = address
+        self.authkey = authkey
+        self._idle = queue.LifoQueue(maxsize=max_idle_connections)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return Client(self.address, authkey=self.authkey)
+
+    def _release(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def call(self, op, payload=None):
+        conn = self._acquire()
+        try:
+            conn.send((op, payload))
+            status, result = conn.recv()
+        except Exception:
+            # Broken connection (e.g. server restarted): never put it back in the pool
+            conn.close()
+            raise
+        self._release(conn)
+        if status != "ok":
+            raise RuntimeError(f"Inference server error on '{op}': {result}")
+        return result
+
+    def check_liveness(self, face_img):
+        return self.call("liveness", face_img)
+
+    def embed_face(self, face_img):
+        return self.call("embedding", face_img)
+
+    def embed_faces(self, face_imgs):
+        return self.call("embeddings", list(face_imgs))
+
+    def ping(self):
+        return self.call("ping")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def is_remote_inference():
+    return settings.INFERENCE_MODE == "remote"
+
+
+def get_inference_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = InferenceClient(get_server_address(), get_authkey())
+    return _client
@@ -0,0 +1,86 @@
+"""
+Shared inference server for multi-worker deployments.
+
+One process owns the liveness and embedding models; uvicorn workers started with
+INFERENCE_MODE=remote send it face crops over local IPC instead of loading their own
+TensorFlow/Facenet copies. Each connection is served by its own thread, and all of them
+feed the same micro-batchers, so requests from every worker share forward passes.
+
+Run from the `backend` folder, before starting the HTTP workers:
+    python -m app.core.inference_server
+Unless INFERENCE_SERVER_AUTHKEY is set, the first start writes a random handshake key to
+INFERENCE_SERVER_AUTHKEY_FILE (mode 0600), which workers of the same user read.
+"""
+import os
+import sys
+import threading
+from multiprocessing.connection import Listener
+
+from .config import settings
+from .inference_client import get_server_address, get_authkey
+from .liveness_utils import predict_liveness_local
+from .embedding_utils import embed_face_local, get_face_embeddings
+from .face_utils import preload_models
+
+HANDLERS = {
+    # Errors go back to the client as errors, never as a cacheable "spoof" verdict
+    "liveness": predict_liveness_local,
+    "embedding": embed_face_local,
+    "embeddings": get_face_embeddings,
+    "ping": lambda _: "pong",
+}
+
+
+def _handle_connection(conn):
+    with conn:
+        while True:
+            try:
+                op, payload = conn.recv()
+            except (EOFError, OSError):
+                break
+            try:
+                response = ("ok", HANDLERS[op](payload))
+            except Exception as e:
+                response = ("error", f"{type(e).__name__}: {e}")
+            try:
+                conn.send(response)
+            except (EOFError, OSError):
+                break
+
+
+def serve(address=None):
+    # This process is the one that runs the models locally
+    settings.INFERENCE_MODE = "local"
+    address = address or get_server_address()
+    if sys.platform != "win32" and os.path.exists(address):
+        # Stale socket file from a previous run
+        os.remove(address)
+
+    authkey = get_authkey(create=True)
+    preload_models()
+    if sys.platform != "win32":
+        # Only this user may connect: the socket is created 0600, not just chmod-ed afterwards
+        previous_umask = os.umask(0o177)
+        try:
+            listener = Listener(address, authkey=authkey)
+        finally:
+            os.umask(previous_umask)
+        os.chmod(address, 0o600)
+    else:
+        listener = Listener(address, authkey=authkey)
+    print(f"Inference server listening on {address}")
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # Failed handshake (e.g. wrong authkey) must not take the server down
+                print(f"Rejected inference client: {e}")
+                continue
+            threading.Thread(target=_handle_connection, args=(conn,), daemon=True).start()
+    finally:
+        listener.close()
+
+
+if __name__ == "__main__":
+    serve()
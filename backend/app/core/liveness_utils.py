@@ -1,64 +1,156 @@
-import tensorflow as tf
 import numpy as np
 import cv2
 import os
+import threading
+import time
+
+from .config import settings
+from .batching import MicroBatcher
+from .onnx_runtime import create_onnx_session
+from .inference_client import is_remote_inference, get_inference_client
+from .result_cache import invalidate_result_cache
+from .metrics import record_model_load
 
 # Define the model path relative to the backend root
 # In production, this might be an absolute path or from environment variables
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "../../ml_model/liveness_model.h5")
+# Produced by ml_model/scripts/export_onnx.py
+ONNX_MODEL_PATH = os.path.join(os.path.dirname(__file__), "../../ml_model/liveness_model.onnx")
+
+class KerasLivenessModel:
+    """Serves the liveness model through TensorFlow/Keras."""
+
+    def __init__(self, path):
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(path)
+
+    def predict(self, batch):
+        # predict_on_batch skips the per-call data pipeline setup that predict() pays
+        return np.asarray(self.model.predict_on_batch(batch))
+
+class OnnxLivenessModel:
+    """Serves the exported liveness model through ONNX Runtime on CPU, without TensorFlow."""
+
+    def __init__(self, path):
+        self.session = create_onnx_session(path)
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+def load_liveness_model(backend=None):
+    """Loads the liveness model with the given backend ("keras" or "onnx"). Returns None if unavailable."""
+    backend = backend or settings.LIVENESS_BACKEND
+    if backend == "onnx":
+        path = settings.LIVENESS_ONNX_PATH or ONNX_MODEL_PATH
+        loader = lambda: OnnxLivenessModel(path)
+    else:
+        path = MODEL_PATH
+        loader = lambda: KerasLivenessModel(path)
+
+    if not os.path.exists(path):
+        print(f"Liveness model not found at {path}")
+        return None
+    try:
+        start = time.perf_counter()
+        model = loader()
+        record_model_load("liveness", backend, time.perf_counter() - start)
+        print(f"Liveness model loaded successfully from {path} ({backend} backend)")
+        return model
+    except Exception as e:
+        print(f"Error loading liveness model: {e}")
+        return None
 
 # Global variable to hold the loaded model
 _model = None
+_model_lock = threading.Lock()
 
 def get_liveness_model():
     """Lazy load the liveness model."""
     global _model
     if _model is None:
-        if os.path.exists(MODEL_PATH):
-            try:
-                _model = tf.keras.models.load_model(MODEL_PATH)
-                print(f"Liveness model loaded successfully from {MODEL_PATH}")
-            except Exception as e:
-                print(f"Error loading liveness model: {e}")
-        else:
-            print(f"Liveness model not found at {MODEL_PATH}")
+        with _model_lock:
+            if _model is None:
+                _model = load_liveness_model()
+                # Cached verdicts came from whatever model was there before
+                invalidate_result_cache()
     return _model
 
+def preprocess_face(face_img):
+    """Resizes and normalizes a face crop exactly as during training."""
+    # 1. Standardize size to 224x224 (matching training)
+    img = cv2.resize(face_img, (224, 224))
+    # 2. Normalize pixel values
+    return img.astype("float32") / 255.0
+
+def predict_spoof_scores(face_batch):
+    """Runs one forward pass over a list of preprocessed faces. Returns one spoof score per face."""
+    model = get_liveness_model()
+    predictions = model.predict(np.stack(face_batch))
+    return [float(p) for p in np.asarray(predictions).reshape(len(face_batch), -1)[:, 0]]
+
+# Shared batching queue so concurrent requests share forward passes
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_liveness_batcher():
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    "liveness",
+                    predict_spoof_scores,
+                    max_batch_size=settings.LIVENESS_MAX_BATCH_SIZE,
+                    max_wait_ms=settings.LIVENESS_MAX_WAIT_MS,
+                )
+    return _batcher
+
 def check_liveness(face_img):
     """
     Analyzes a cropped face image for liveness.
     Returns: (is_live, confidence)
     """
-    model = get_liveness_model()
-    if model is None:
-        # SECURITY UPDATE: Fail-Secure
-        # If model is missing, we MUST deny access
-        print("Security Alert: Liveness model not loaded. Defaulting to DENY.")
-        return False, 0.0 
-
     try:
-        # 1. Standardize size to 224x224 (matching training)
-        img = cv2.resize(face_img, (224, 224))
-        
-        # 2. Normalize pixel values
-        img = img.astype("float32") / 255.0
-        
-        # 3. Add batch dimension (1, 224, 224, 3)
-        img = np.expand_dims(img, axis=0)
-        
-        # 4. Predict
-        prediction = model.predict(img, verbose=0)[0][0]
-        
-        # Based on training folder order (usually alphabetical):
-        # real = 0, spoof = 1
-        # SECURITY UPDATE: Stricter Threshold
-        # Used to be 0.5. Now 0.2. 
-        # The model must be 80% sure it's real (low spoof score) to pass.
-        is_live = prediction < 0.2
-        confidence = 1.0 - prediction if is_live else prediction
-        
-        return bool(is_live), float(confidence)
+        return predict_liveness(face_img)
     except Exception as e:
         print(f"Error during liveness check: {e}")
         # SECURITY UPDATE: Fail-Secure on Error
         return False, 0.0
+
+def predict_liveness(face_img):
+    """
+    check_liveness without the fail-secure fallback: raises when no verdict could be
+    computed (model missing, inference or IPC error), so callers can tell a transient
+    failure from a real spoof verdict.
+    """
+    if is_remote_inference():
+        is_live, confidence = get_inference_client().check_liveness(face_img)
+        return bool(is_live), float(confidence)
+    return predict_liveness_local(face_img)
+
+def predict_liveness_local(face_img):
+    """predict_liveness using the model loaded in this process."""
+    model = get_liveness_model()
+    if model is None:
+        # SECURITY UPDATE: Fail-Secure
+        # If model is missing, we MUST deny access
+        raise RuntimeError("Security Alert: Liveness model not loaded. Defaulting to DENY.")
+
+    img = preprocess_face(face_img)
+
+    # Predict, batched together with other in-flight requests when enabled
+    if settings.LIVENESS_BATCHING:
+        prediction = get_liveness_batcher().submit(img).result()
+    else:
+        prediction = predict_spoof_scores([img])[0]
+
+    # Based on training folder order (usually alphabetical):
+    # real = 0, spoof = 1
+    # SECURITY UPDATE: Stricter Threshold
+    # Used to be 0.5. Now 0.2.
+    # The model must be 80% sure it's real (low spoof score) to pass.
+    is_live = prediction < 0.2
+    confidence = 1.0 - prediction if is_live else prediction
+
+    return bool(is_live), float(confidence)
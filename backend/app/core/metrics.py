@@ -0,0 +1,187 @@
+"""
+In-process metrics in the Prometheus text exposition format (served at /metrics).
+
+Only what the service needs: counters, gauges and fixed-bucket histograms with labels,
+all thread-safe. Per-request stage timings are also collected in a context variable so the
+request log line can report where the time went.
+"""
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; covers sub-millisecond cache hits up to multi-second cold model loads
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Registered metrics, in registration order
+_registry = []
+
+# Stage name -> seconds for the request being handled (None outside a request)
+stage_timings = contextvars.ContextVar("stage_timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+_stat_gauges = {}
+_stat_gauges_lock = threading.Lock()
+
+
+def export_stats(prefix, stats, **labels):
+    """
+    Mirrors the numeric fields of a component's stats() dict (executor, batchers, caches...)
+    into gauges named face_access_<prefix>_<field>. Called at scrape time.
+    """
+    for field, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f"face_access_{prefix}_{field}"
+        with _stat_gauges_lock:
+            gauge = _stat_gauges.get(name)
+            if gauge is None:
+                gauge = _stat_gauges[name] = Gauge(name, f"{field} of {prefix} (from its stats()).", sorted(labels))
+        gauge.set(value, **labels)
+
+
+def render_metrics():
+    """Every registered metric in the Prometheus text format."""
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Metrics of the request pipeline
+STAGE_SECONDS = Histogram(
+    "face_access_stage_seconds", "Time spent in each stage of the verify/enroll pipeline.", ["stage"]
+)
+REQUEST_SECONDS = Histogram(
+    "face_access_http_request_seconds", "HTTP request latency.", ["method", "route", "status"]
+)
+VERIFY_OUTCOMES = Counter(
+    "face_access_verify_outcomes_total", "Access decisions by outcome (granted, denied, spoof, no_face).", ["outcome"]
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "face_access_model_load_seconds", "Time it took to load each model.", ["model", "backend"]
+)
+MODEL_LOADED = Gauge(
+    "face_access_model_loaded", "1 once a model is loaded in this process.", ["model", "backend"]
+)
+WARMUP_SECONDS = Gauge(
+    "face_access_warmup_seconds", "Duration of each model load / warm-up step at startup.", ["stage"]
+)
+READY = Gauge("face_access_ready", "1 once the models are loaded and warmed up.")
+
+
+@contextmanager
+def stage(name):
+    """Times a pipeline stage into STAGE_SECONDS and the current request's timings."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = stage_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def record_model_load(model, backend, seconds):
+    MODEL_LOAD_SECONDS.set(round(seconds, 4), model=model, backend=backend)
+    MODEL_LOADED.set(1, model=model, backend=backend)
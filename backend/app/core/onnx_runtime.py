@@ -0,0 +1,11 @@
+from .config import settings
+
+def create_onnx_session(path):
+    """Creates a CPU ONNX Runtime session using the thread settings from config."""
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    # 0 lets ONNX Runtime pick the number of physical cores
+    options.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS
+    options.inter_op_num_threads = settings.ONNX_INTER_OP_THREADS
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
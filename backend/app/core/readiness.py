@@ -0,0 +1,109 @@
+import threading
+import time
+
+from .config import settings
+from .metrics import READY, WARMUP_SECONDS
+from .inference_client import is_remote_inference, get_inference_client
+
+
+class Readiness:
+    """
+    Startup lifecycle of the models: starting -> loading -> warming_up -> ready (or failed).
+    Loading alone leaves the first real predict() paying for graph tracing and allocator
+    warm-up, so warm-up runs dummy inferences through the same liveness and embedding
+    paths the requests use. /api/ready reports ready only after that.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self.state = "starting"
+        self.error = None
+        self.durations = {}
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def _set(self, state, error=None):
+        with self._lock:
+            self.state = state
+            self.error = error
+        READY.set(1 if state == "ready" else 0)
+
+    def _timed(self, name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self.durations[name] = round(seconds, 4)
+        WARMUP_SECONDS.set(round(seconds, 4), stage=name)
+        return result
+
+    def run(self):
+        """Loads and warms up the models once. Returns True when ready."""
+        # The inference stack (OpenCV, model runtimes) is only imported when warming up
+        import numpy as np
+        from .face_utils import detect_face, get_face_embedding
+        from .liveness_utils import check_liveness, get_liveness_model
+        from .embedding_utils import get_embedding_model
+
+        with self._run_lock:
+            if self.ready:
+                return True
+            try:
+                self._set("loading")
+                if is_remote_inference():
+                    # Models live (and are warmed up) in the shared inference server
+                    self._timed("inference_server_connect", get_inference_client().ping)
+                else:
+                    if self._timed("liveness_load", get_liveness_model) is None:
+                        raise RuntimeError("Liveness model not available")
+                    self._timed("embedding_load", get_embedding_model)
+
+                self._set("warming_up")
+                rng = np.random.default_rng(0)
+                frame = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+                face = rng.integers(0, 256, (160, 160, 3), dtype=np.uint8)
+                self._timed("detector_warmup", detect_face, frame)
+                for i in range(max(1, settings.WARMUP_ITERATIONS)):
+                    # The first pass pays for tracing; later ones show the steady-state latency
+                    suffix = "" if i == 0 else "_steady"
+                    self._timed(f"liveness_warmup{suffix}", check_liveness, face)
+                    if self._timed(f"embedding_warmup{suffix}", get_face_embedding, face) is None:
+                        raise RuntimeError("Embedding warm-up inference failed")
+                self._set("ready")
+                print(f"Models ready: {self.durations}")
+                return True
+            except Exception as e:
+                print(f"Model warm-up failed: {e}")
+                self._set("failed", str(e))
+                return False
+
+    def run_until_ready(self):
+        """Background startup task. A remote inference server may come up after us, so keep trying."""
+        while not self.run():
+            if not is_remote_inference():
+                return
+            time.sleep(settings.READINESS_RETRY_S)
+
+    def status(self):
+        with self._lock:
+            return {
+                "ready": self.state == "ready",
+                "state": self.state,
+                "error": self.error,
+                "durations_s": dict(self.durations),
+            }
+
+
+_readiness = Readiness()
+
+
+def get_readiness():
+    return _readiness
+
+
+def start_warmup():
+    """Starts loading and warming up the models without blocking startup."""
+    threading.Thread(target=_readiness.run_until_ready, name="model-warmup", daemon=True).start()
@@ -0,0 +1,72 @@
+import contextvars
+import json
+import logging
+import sys
+import time
+import uuid
+
+from starlette.datastructures import MutableHeaders
+
+from .metrics import REQUEST_SECONDS, stage_timings
+
+# Request ID of the request being handled; also visible in executor threads
+request_id = contextvars.ContextVar("request_id", default=None)
+
+# One JSON line per request: request ID, route, status, duration and stage timings
+logger = logging.getLogger("face_access.requests")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class RequestContextMiddleware:
+    """
+    Assigns every HTTP request an ID (the client's X-Request-ID, or a new one), returns it
+    in the X-Request-ID response header, records request latency and writes a structured
+    log line with the per-stage timings collected while handling it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        incoming = dict(scope.get("headers") or []).get(b"x-request-id")
+        rid = incoming.decode("latin-1")[:64] if incoming else uuid.uuid4().hex
+        timings = {}
+        rid_token = request_id.set(rid)
+        timings_token = stage_timings.set(timings)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Request-ID", rid)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            duration = time.perf_counter() - start
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(duration, method=scope["method"], route=route_path, status=status)
+            logger.info(json.dumps({
+                "event": "request",
+                "request_id": rid,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route_path,
+                "status": status,
+                "duration_ms": round(duration * 1000, 2),
+                "stages_ms": {name: round(seconds * 1000, 2) for name, seconds in timings.items()},
+            }))
+            request_id.reset(rid_token)
+            stage_timings.reset(timings_token)
@@ -0,0 +1,136 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future
+
+from .config import settings
+
+# Perception results for one image: the face box (None when no face was found, in which
+# case the whole frame was embedded and liveness skipped), the liveness verdict and the
+# embedding (None when the face was rejected as a spoof or could not be embedded).
+# failed marks fail-secure results of a model/IPC error; they are returned but never cached.
+# No pixels are kept: cached entries stay a few hundred bytes each.
+FaceAnalysis = namedtuple(
+    "FaceAnalysis", ["box", "is_live", "liveness_confidence", "embedding", "failed"], defaults=(False,)
+)
+
+
+def content_key(data):
+    """Hash of the encoded image bytes (after base64 decoding)."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def face_dhash(face_img):
+    """64-bit difference hash of a face crop; stable across re-encodes of the same frame."""
+    # Imported here so the cache (and /api/health) does not pull in OpenCV
+    import cv2
+    import numpy as np
+    gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY) if face_img.ndim == 3 else face_img
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+class ResultCache:
+    """
+    Bounded LRU cache with TTL for face analysis results, with single-flight coalescing:
+    while a key is being computed, identical requests wait for that computation instead of
+    running the models again. Failed computations (exceptions, or values rejected by the
+    `cacheable` predicate) are not cached.
+    """
+
+    def __init__(self, max_entries, ttl_s):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # key -> (expires_at, value)
+        self._inflight = {} # key -> Future
+        # Bumped on invalidation so computations started before it are not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute, cacheable=None):
+        if self.max_entries <= 0:
+            return compute()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+                owner = True
+                generation = self._generation
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            if generation == self._generation and (cacheable is None or cacheable(value)):
+                self._entries[key] = (time.monotonic() + self.ttl_s, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        future.set_result(value)
+        return value
+
+    def invalidate(self):
+        """Drops every entry, e.g. after a model (re)load."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache(settings.RESULT_CACHE_SIZE, settings.RESULT_CACHE_TTL_S)
+    return _cache
+
+
+def invalidate_result_cache():
+    """Called whenever a liveness or embedding model is (re)loaded."""
+    if _cache is not None:
+        _cache.invalidate()
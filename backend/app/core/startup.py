@@ -0,0 +1,37 @@
+"""
+Process startup and shutdown shared by every entrypoint (app/main.py and the root main.py).
+"""
+from contextlib import asynccontextmanager
+
+from app.db import models
+from app.db.database import engine, SessionLocal
+from app.db.migrations import run_migrations
+from app.db.log_writer import get_log_writer
+from .gallery import load_gallery
+from .readiness import start_warmup
+
+
+def init_database():
+    """Creates missing tables and brings an existing database up to the current schema."""
+    models.Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+
+def init_app_state():
+    """Schema first, then the in-memory gallery index built from the migrated users table."""
+    init_database()
+    # Build the gallery once; enroll/delete keep it updated incrementally
+    with SessionLocal() as db:
+        load_gallery(db)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """FastAPI lifespan: prepare the database and gallery, warm up, flush access logs on exit."""
+    init_app_state()
+    # Load and warm up the models in a background thread to not block startup;
+    # /api/ready answers 503 until they are hot
+    start_warmup()
+    yield
+    # Write out every queued access event before the process exits
+    get_log_writer().stop()
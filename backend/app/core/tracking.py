@@ -0,0 +1,83 @@
+import cv2
+
+
+class FaceTracker:
+    """
+    Follows a face box from frame to frame with normalized template matching, so a video
+    stream only needs a full face detection every few frames or when the track is lost.
+    Matching runs on a downscaled grayscale copy of the frame and only inside a window
+    around the previous box, which makes an update much cheaper than a detection.
+    """
+
+    def __init__(self, min_score=0.6, search_margin=0.5, work_dim=320):
+        self.min_score = min_score
+        self.search_margin = search_margin
+        self.work_dim = work_dim
+        self.box = None  # (x, y, w, h) in full-resolution frame coordinates
+        self._template = None
+        self._scale = 1.0
+
+    @property
+    def active(self):
+        return self.box is not None
+
+    def _prepare(self, frame):
+        height, width = frame.shape[:2]
+        self._scale = min(1.0, self.work_dim / max(height, width))
+        small = cv2.resize(frame, (int(width * self._scale), int(height * self._scale))) if self._scale < 1.0 else frame
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _to_small(self, box):
+        return tuple(int(v * self._scale) for v in box)
+
+    def start(self, frame, box):
+        """Starts tracking the given box."""
+        gray = self._prepare(frame)
+        x, y, w, h = self._to_small(box)
+        if w < 8 or h < 8:
+            self.reset()
+            return
+        self._template = gray[y:y + h, x:x + w].copy()
+        self.box = tuple(int(v) for v in box)
+
+    def update(self, frame):
+        """Locates the tracked face in a new frame. Returns the new box, or None if the track is lost."""
+        if not self.active:
+            return None
+        gray = self._prepare(frame)
+        x, y, w, h = self._to_small(self.box)
+        margin_w, margin_h = int(w * self.search_margin), int(h * self.search_margin)
+        x1, y1 = max(0, x - margin_w), max(0, y - margin_h)
+        x2, y2 = min(gray.shape[1], x + w + margin_w), min(gray.shape[0], y + h + margin_h)
+        window = gray[y1:y2, x1:x2]
+        th, tw = self._template.shape[:2]
+        if window.shape[0] < th or window.shape[1] < tw:
+            self.reset()
+            return None
+
+        scores = cv2.matchTemplate(window, self._template, cv2.TM_CCOEFF_NORMED)
+        _, best_score, _, (best_x, best_y) = cv2.minMaxLoc(scores)
+        if best_score < self.min_score:
+            self.reset()
+            return None
+
+        new_x, new_y = x1 + best_x, y1 + best_y
+        # Refresh the template so slow changes in pose and lighting are followed
+        self._template = gray[new_y:new_y + th, new_x:new_x + tw].copy()
+        self.box = (int(new_x / self._scale), int(new_y / self._scale), self.box[2], self.box[3])
+        return self.box
+
+    def reset(self):
+        self.box = None
+        self._template = None
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes."""
+    ax2, ay2 = a[0] + a[2], a[1] + a[3]
+    bx2, by2 = b[0] + b[2], b[1] + b[3]
+    inter_w = max(0, min(ax2, bx2) - max(a[0], b[0]))
+    inter_h = max(0, min(ay2, by2) - max(a[1], b[1]))
+    inter = inter_w * inter_h
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
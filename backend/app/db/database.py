@@ -1,7 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 import os
+import time
 
 from app.core.config import settings
 
@@ -13,10 +15,43 @@ if settings.DATABASE_URL.startswith("sqlite"):
         os.makedirs(db_dir)
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def engine_options(url):
+    """Connection and pool settings of the configured performance profile."""
+    options = {}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {
+            "check_same_thread": False,
+            # Wait for a competing writer instead of failing with "database is locked"
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000.0,
+        }
+        if ":memory:" in url:
+            # In-memory databases live in a single connection, pool settings do not apply
+            return options
+    else:
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = settings.DB_POOL_RECYCLE_S
+    options["pool_size"] = settings.DB_POOL_SIZE
+    options["max_overflow"] = settings.DB_MAX_OVERFLOW
+    options["pool_timeout"] = settings.DB_POOL_TIMEOUT_S
+    return options
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside the (single) writer; NORMAL sync is safe in WAL mode."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    # Negative cache_size is in KiB
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+if IS_SQLITE:
+    event.listen(engine, "connect", apply_sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -27,3 +62,64 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def check_database():
+    """One SELECT 1 round trip. Returns {"connected", "latency_ms"[, "error"]}."""
+    start = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception as e:
+        return {"connected": False, "latency_ms": None, "error": f"{type(e).__name__}: {e}"}
+    return {"connected": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+# Optional async engine for the pure-DB routers (logs, stats, admin listing)
+def async_database_url(url):
+    """Maps a sync DATABASE_URL to its async driver (aiosqlite / asyncpg)."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:") or url.startswith("postgresql+psycopg2:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    async_url = async_database_url(SQLALCHEMY_DATABASE_URL)
+    async_options = engine_options(SQLALCHEMY_DATABASE_URL)
+    if IS_SQLITE:
+        # aiosqlite runs its own thread per connection; check_same_thread does not apply
+        async_options["connect_args"] = {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000.0}
+    async_engine = create_async_engine(async_url, **async_options)
+    if IS_SQLITE:
+        event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+class DBRunner:
+    """
+    Lets async routes run ordinary (sync) ORM code without blocking the event loop:
+    on an AsyncSession through run_sync when DB_ASYNC is on, otherwise with a regular
+    Session in the threadpool. Query helpers are written once and work either way.
+    """
+
+    def __init__(self, session, is_async):
+        self.session = session
+        self.is_async = is_async
+
+    async def run(self, fn, *args, **kwargs):
+        """Calls fn(session, *args, **kwargs) and returns its result."""
+        if self.is_async:
+            return await self.session.run_sync(lambda sync_session: fn(sync_session, *args, **kwargs))
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+async def get_db_runner():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield DBRunner(session, True)
+    else:
+        db = SessionLocal()
+        try:
+            yield DBRunner(db, False)
+        finally:
+            await run_in_threadpool(db.close)
@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.core.config import settings
+
+# Embeddings are stored as raw little-endian floats; the dtype name is kept per row
+STORAGE_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "float16": np.dtype("<f2"),
+}
+
+
+def encode_embedding(embedding, dtype=None):
+    """Serializes an embedding into a compact binary blob. Returns (blob, dim, dtype_name)."""
+    dtype = dtype or settings.EMBEDDING_STORAGE_DTYPE
+    arr = np.asarray(embedding, dtype=STORAGE_DTYPES[dtype]).ravel()
+    return arr.tobytes(), arr.size, dtype
+
+
+def decode_embedding(blob, dtype="float32"):
+    """Turns a stored blob back into a float32 vector without any Python float lists."""
+    return np.frombuffer(blob, dtype=STORAGE_DTYPES[dtype]).astype(np.float32)
+
+
+def decode_embedding_matrix(blobs, dim, dtype="float32"):
+    """Decodes many same-shaped blobs straight into one (N, dim) float32 matrix."""
+    if not blobs:
+        return np.empty((0, dim), dtype=np.float32)
+    matrix = np.frombuffer(b"".join(blobs), dtype=STORAGE_DTYPES[dtype]).reshape(len(blobs), dim)
+    return matrix.astype(np.float32)
+
+
+def set_user_embedding(user, embedding, model_name=None):
+    """Stores an embedding and its metadata on a User row."""
+    blob, dim, dtype = encode_embedding(embedding)
+    user.face_embedding = blob
+    user.embedding_dim = dim
+    user.embedding_dtype = dtype
+    user.embedding_model = model_name or settings.EMBEDDING_MODEL
@@ -0,0 +1,199 @@
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.events import get_event_broker
+from app.db import models
+from app.db.database import SessionLocal
+from app.db.stats import update_rollups, prune_old_data
+
+_STOP = object()
+
+
+class AccessLogWriter:
+    """
+    In-process sink for access events.
+    Requests only enqueue an event; a background thread writes them to `access_logs` with
+    bulk inserts once `batch_size` events are waiting or `flush_interval_ms` has passed,
+    so no door opening waits on a commit. If the queue is full, events are dropped
+    (and counted) rather than blocking the verify path.
+    The same transaction bumps the access_stats rollups (in a savepoint, so a rollup
+    failure never costs the raw rows), and every `prune_interval_s` the thread applies
+    the retention policy to old raw logs.
+    """
+
+    def __init__(self, session_factory, batch_size=200, flush_interval_ms=1000, max_queue_size=10000, prune_interval_s=3600):
+        self.session_factory = session_factory
+        self.prune_interval = prune_interval_s
+        self._next_prune = time.monotonic()
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Set by stop() when the queue is too full to take the stop marker
+        self._stop_requested = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+        self._rollup_failed = 0
+        self._batches = 0
+
+    def record(self, status, user_id=None, liveness_score=None, match_confidence=None, user_name=None):
+        """
+        Queues one access event ("granted", "denied" or "spoof") and pushes it to live
+        subscribers right away. Never blocks.
+        """
+        self.start()
+        event = {
+            "user_id": user_id,
+            "status": status,
+            "liveness_score": liveness_score,
+            "match_confidence": match_confidence,
+            # Stamped now: the row is written later, but the event happened now
+            "timestamp": datetime.now(timezone.utc),
+        }
+        get_event_broker().publish({**event, "user_name": user_name or "Unknown"})
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped += 1
+
+    def start(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="access-log-writer", daemon=True)
+                    self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """Flushes everything still queued and stops the writer thread."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            # Saturated queue: the thread stops after its current batch, the rest is flushed here
+            self._stop_requested.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"Access log writer did not stop in time; {self._queue.qsize()} events not written.")
+        else:
+            remaining = self._drain()
+            if remaining:
+                self._write(remaining)
+        self._thread = None
+        self._stop_requested.clear()
+
+    def _run(self):
+        while True:
+            batch, stopping = self._collect()
+            if batch:
+                self._write(batch)
+            if stopping or self._stop_requested.is_set():
+                return
+            if self.prune_interval > 0 and time.monotonic() >= self._next_prune:
+                self._prune()
+
+    def _prune(self):
+        self._next_prune = time.monotonic() + self.prune_interval
+        try:
+            with self.session_factory() as db:
+                deleted = prune_old_data(db)
+            if deleted:
+                print(f"Retention policy removed {deleted} old access log/rollup rows.")
+        except Exception as e:
+            print(f"Error applying access log retention: {e}")
+
+    def _collect(self):
+        """Waits for the first event, then gathers more until the batch is full or the interval expires."""
+        try:
+            # Wake up now and then even when idle, so retention still runs
+            first = self._queue.get(timeout=self.prune_interval or None)
+        except queue.Empty:
+            return [], False
+        if first is _STOP:
+            return self._drain(), True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if event is _STOP:
+                return batch + self._drain(), True
+            batch.append(event)
+        return batch, False
+
+    def _drain(self):
+        events = []
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                return events
+            if event is not _STOP:
+                events.append(event)
+
+    def _write(self, batch):
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            try:
+                with self.session_factory() as db:
+                    db.execute(insert(models.AccessLog), chunk)
+                    try:
+                        with db.begin_nested():
+                            update_rollups(db, chunk)
+                    except Exception as e:
+                        # The raw logs are the record of truth; keep them even without rollups
+                        print(f"Error updating access rollups for {len(chunk)} logs: {e}")
+                        with self._stats_lock:
+                            self._rollup_failed += len(chunk)
+                    db.commit()
+            except Exception as e:
+                print(f"Error writing {len(chunk)} access logs: {e}")
+                with self._stats_lock:
+                    self._failed += len(chunk)
+                continue
+            with self._stats_lock:
+                self._written += len(chunk)
+                self._batches += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "written": self._written,
+                "batches": self._batches,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "rollup_failed": self._rollup_failed,
+            }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AccessLogWriter(
+                    SessionLocal,
+                    batch_size=settings.ACCESS_LOG_BATCH_SIZE,
+                    flush_interval_ms=settings.ACCESS_LOG_FLUSH_INTERVAL_MS,
+                    max_queue_size=settings.ACCESS_LOG_QUEUE_SIZE,
+                    prune_interval_s=settings.ACCESS_LOG_PRUNE_INTERVAL_S,
+                )
+    return _writer
@@ -0,0 +1,164 @@
+"""
+Lightweight schema migrations applied at startup (no Alembic in this project).
+
+Run manually from the `backend` folder with:
+    python -m app.db.migrations
+"""
+import json
+from sqlalchemy import inspect, text, LargeBinary, Integer, String
+
+from app.db.embeddings import encode_embedding
+from app.core.config import settings
+
+
+def migrate_json_embeddings(engine, batch_size=500):
+    """
+    Moves embeddings from the legacy JSON `users.face_embedding` column into the
+    binary `embedding` column (+ dim/dtype/model metadata), then drops the legacy column.
+    Safe to call repeatedly; returns the number of rows converted.
+    """
+    inspector = inspect(engine)
+    if "users" not in inspector.get_table_names():
+        return 0
+    columns = {c["name"] for c in inspector.get_columns("users")}
+    if "face_embedding" not in columns:
+        return 0
+
+    dialect = engine.dialect
+    new_columns = {
+        "embedding": LargeBinary().compile(dialect=dialect),
+        "embedding_dim": Integer().compile(dialect=dialect),
+        "embedding_dtype": String().compile(dialect=dialect),
+        "embedding_model": String().compile(dialect=dialect),
+    }
+
+    converted = 0
+    with engine.begin() as conn:
+        for name, ddl in new_columns.items():
+            if name not in columns:
+                conn.execute(text(f"ALTER TABLE users ADD COLUMN {name} {ddl}"))
+
+        rows = conn.execute(text("SELECT id, face_embedding FROM users WHERE embedding IS NULL")).fetchall()
+        update = text(
+            "UPDATE users SET embedding = :blob, embedding_dim = :dim, "
+            "embedding_dtype = :dtype, embedding_model = :model WHERE id = :id"
+        )
+        for start in range(0, len(rows), batch_size):
+            params = []
+            for user_id, legacy in rows[start:start + batch_size]:
+                # SQLite hands back the JSON text, PostgreSQL an already-decoded list
+                values = json.loads(legacy) if isinstance(legacy, (str, bytes)) else legacy
+                blob, dim, dtype = encode_embedding(values)
+                params.append({"id": user_id, "blob": blob, "dim": dim, "dtype": dtype, "model": settings.EMBEDDING_MODEL})
+            conn.execute(update, params)
+            converted += len(params)
+
+        # The legacy column is NOT NULL, so it has to go before the ORM can insert new users
+        conn.execute(text("ALTER TABLE users DROP COLUMN face_embedding"))
+
+    print(f"Migrated {converted} face embeddings from JSON to binary storage.")
+    return converted
+
+
+def add_image_hash_column(engine):
+    """Adds users.image_hash (content-addressed face store) to databases created before it."""
+    inspector = inspect(engine)
+    if "users" not in inspector.get_table_names():
+        return
+    columns = {c["name"] for c in inspector.get_columns("users")}
+    if "image_hash" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE users ADD COLUMN image_hash VARCHAR(64)"))
+
+
+def migrate_legacy_face_images(engine):
+    """
+    Moves per-name reference images (data/faces/<safe name>.jpg) into the content-addressed
+    store and points users.image_hash at them. Returns the number of users migrated.
+    """
+    import os
+    from app.core.face_store import legacy_image_path, store_jpeg_bytes
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, name FROM users WHERE image_hash IS NULL")).fetchall()
+    pending = [(user_id, name, legacy_image_path(name)) for user_id, name in rows]
+    pending = [row for row in pending if os.path.exists(row[2])]
+    if not pending:
+        return 0
+
+    migrated, stored_paths = 0, set()
+    update = text("UPDATE users SET image_hash = :hash WHERE id = :id")
+    with engine.begin() as conn:
+        for user_id, name, path in pending:
+            try:
+                with open(path, "rb") as f:
+                    image_hash = store_jpeg_bytes(f.read())
+            except Exception as e:
+                print(f"Could not migrate reference image of {name}: {e}")
+                continue
+            conn.execute(update, {"hash": image_hash, "id": user_id})
+            stored_paths.add(path)
+            migrated += 1
+    # Only after the hashes are committed; several names may have shared one legacy file
+    for path in stored_paths:
+        os.remove(path)
+    print(f"Moved {migrated} reference images into the content-addressed face store.")
+    return migrated
+
+
+def normalize_sqlite_log_timestamps(engine):
+    """
+    SQLite stores DateTime as text. Rows written through the old CURRENT_TIMESTAMP default
+    read 'YYYY-MM-DD HH:MM:SS', while SQLAlchemy binds 'YYYY-MM-DD HH:MM:SS.ffffff'; the
+    shorter string sorts first, which breaks the (timestamp, id) keyset cursor of /api/logs.
+    Pads them to the canonical form. Returns the number of rows fixed.
+    """
+    if engine.dialect.name != "sqlite" or "access_logs" not in inspect(engine).get_table_names():
+        return 0
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            "UPDATE access_logs SET timestamp = timestamp || '.000000' WHERE length(timestamp) = 19"
+        ))
+    if result.rowcount:
+        print(f"Normalized {result.rowcount} legacy access log timestamps.")
+    return result.rowcount
+
+
+def ensure_indexes(engine):
+    """create_all skips tables that already exist, so add indexes introduced since then."""
+    from app.db import models
+    for table in models.Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def backfill_access_stats(engine):
+    """Seeds the access_stats rollups from access logs written before they existed."""
+    from sqlalchemy.orm import Session
+    from app.db.stats import backfill_rollups
+    with Session(engine) as db:
+        backfill_rollups(db)
+
+
+def seed_gallery_state(engine):
+    """Creates the gallery version row, so enrollments only ever need to update it."""
+    if "gallery_state" not in inspect(engine).get_table_names():
+        return
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT 1 FROM gallery_state WHERE id = 1")).first() is None:
+            conn.execute(text("INSERT INTO gallery_state (id, version) VALUES (1, 0)"))
+
+
+def run_migrations(engine):
+    migrate_json_embeddings(engine)
+    add_image_hash_column(engine)
+    normalize_sqlite_log_timestamps(engine)
+    ensure_indexes(engine)
+    migrate_legacy_face_images(engine)
+    backfill_access_stats(engine)
+    seed_gallery_state(engine)
+
+
+if __name__ == "__main__":
+    from app.db.database import engine
+    run_migrations(engine)
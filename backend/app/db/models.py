@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -7,9 +7,16 @@ class User(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
-    # Store face embeddings as a list of floats (JSON serialized)
+    # Store face embeddings as raw little-endian floats (see app/db/embeddings.py)
     # This follows the requirement: "stores numerical face embeddings rather than real faces"
-    face_embedding = Column(JSON, nullable=False)
+    # The DB column is "embedding"; older databases keep a JSON "face_embedding" column
+    # until app/db/migrations.py converts them.
+    face_embedding = Column("embedding", LargeBinary, nullable=False)
+    embedding_dim = Column(Integer, nullable=False, default=128)
+    embedding_dtype = Column(String, nullable=False, default="float32")
+    embedding_model = Column(String, nullable=False, default="Facenet")
+    # sha256 of the reference image in the content-addressed face store (app/core/face_store.py)
+    image_hash = Column(String(64), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -18,7 +25,41 @@ class AccessLog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True)
-    status = Column(String) # e.g., "granted", "denied"
+    status = Column(String) # "granted", "denied" or "spoof"
     liveness_score = Column(Integer) # Percentage
     match_confidence = Column(Integer) # Percentage
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Back the keyset pagination of /api/logs: newest-first by (timestamp, id),
+    # optionally narrowed to one user or one status
+    __table_args__ = (
+        Index("ix_access_logs_timestamp_id", "timestamp", "id"),
+        Index("ix_access_logs_user_timestamp_id", "user_id", "timestamp", "id"),
+        Index("ix_access_logs_status_timestamp_id", "status", "timestamp", "id"),
+    )
+
+class AccessStat(Base):
+    """Pre-aggregated access counters, kept up to date as access logs are written."""
+    __tablename__ = "access_stats"
+
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String, nullable=False) # "minute", "hour" or "day"
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    # 0 = no matched user (denied/spoof), -1 = all users combined
+    user_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("granularity", "user_id", "bucket_start", "status", name="uq_access_stats_bucket"),
+    )
+
+class GalleryState(Base):
+    """
+    Single row (id 1) whose version is bumped in the same transaction as every enrollment
+    or deletion, so each worker's in-memory gallery can tell it is stale.
+    """
+    __tablename__ = "gallery_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,145 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert, select, delete, func
+
+from app.core.config import settings
+from app.db import models
+
+GRANULARITIES = ("minute", "hour", "day")
+# Rollup rows with this user_id count every user together
+ALL_USERS = -1
+# Rollup rows with this user_id count events without a matched user
+NO_USER = 0
+
+
+def bucket_start(timestamp, granularity):
+    """Start of the minute/hour/day bucket a timestamp falls into."""
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def aggregate_events(events):
+    """Counts events per (granularity, user_id, bucket_start, status), including the all-users rows."""
+    counts = Counter()
+    for event in events:
+        user_id = event["user_id"] or NO_USER
+        for granularity in GRANULARITIES:
+            bucket = bucket_start(event["timestamp"], granularity)
+            counts[(granularity, user_id, bucket, event["status"])] += 1
+            counts[(granularity, ALL_USERS, bucket, event["status"])] += 1
+    return counts
+
+
+def update_rollups(db, events):
+    """Adds a batch of access events to the rollup counters (caller commits)."""
+    rows = [
+        {"granularity": g, "user_id": u, "bucket_start": b, "status": s, "count": n}
+        for (g, u, b, s), n in aggregate_events(events).items()
+    ]
+    if not rows:
+        return
+    table = models.AccessStat
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        stmt = upsert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["granularity", "user_id", "bucket_start", "status"],
+            set_={"count": table.count + stmt.excluded["count"]},
+        )
+        db.execute(stmt, rows)
+        return
+
+    # Portable fallback: update existing counters, insert the missing ones
+    for row in rows:
+        updated = (
+            db.query(table)
+            .filter_by(granularity=row["granularity"], user_id=row["user_id"], bucket_start=row["bucket_start"], status=row["status"])
+            .update({table.count: table.count + row["count"]}, synchronize_session=False)
+        )
+        if not updated:
+            db.execute(insert(table), [row])
+
+
+def query_stats(db, granularity, start, end, user_id=None):
+    """
+    Counts per bucket and status in [start, end), for one user or everyone.
+    Reads only rollup rows (one index range scan), never the raw access_logs table.
+    """
+    table = models.AccessStat
+    rows = db.execute(
+        select(table.bucket_start, table.status, table.count)
+        .where(
+            table.granularity == granularity,
+            table.user_id == (ALL_USERS if user_id is None else user_id),
+            table.bucket_start >= start,
+            table.bucket_start < end,
+        )
+        .order_by(table.bucket_start)
+    ).all()
+    return rows
+
+
+def prune_old_data(db, now=None):
+    """
+    Retention policy: deletes raw access logs older than ACCESS_LOG_RETENTION_DAYS (their
+    counts live on in the rollups) and minute/hour rollups past their own retention.
+    Deletes in chunks so the writer never holds a long lock. Returns rows deleted.
+    """
+    now = now or datetime.now(timezone.utc)
+    deleted = 0
+    if settings.ACCESS_LOG_RETENTION_DAYS > 0:
+        cutoff = now - timedelta(days=settings.ACCESS_LOG_RETENTION_DAYS)
+        log = models.AccessLog
+        while True:
+            ids = select(log.id).where(log.timestamp < cutoff).limit(5000).scalar_subquery()
+            result = db.execute(delete(log).where(log.id.in_(ids)))
+            db.commit()
+            deleted += result.rowcount
+            if result.rowcount < 5000:
+                break
+
+    retention = {
+        "minute": settings.ACCESS_STATS_MINUTE_RETENTION_DAYS,
+        "hour": settings.ACCESS_STATS_HOUR_RETENTION_DAYS,
+    }
+    for granularity, days in retention.items():
+        if days > 0:
+            stat = models.AccessStat
+            result = db.execute(
+                delete(stat).where(stat.granularity == granularity, stat.bucket_start < now - timedelta(days=days))
+            )
+            db.commit()
+            deleted += result.rowcount
+    return deleted
+
+
+def backfill_rollups(db, chunk_size=10000):
+    """Builds the rollups from existing access logs (used once, when the rollup table is new)."""
+    if db.query(func.count(models.AccessStat.id)).scalar():
+        return 0
+    log = models.AccessLog
+    last_id, total = 0, 0
+    while True:
+        rows = (
+            db.query(log.id, log.user_id, log.status, log.timestamp)
+            .filter(log.id > last_id, log.timestamp.isnot(None))
+            .order_by(log.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+        update_rollups(db, [{"user_id": r.user_id, "status": r.status, "timestamp": r.timestamp} for r in rows])
+        db.commit()
+        last_id = rows[-1].id
+        total += len(rows)
+    if total:
+        print(f"Backfilled access rollups from {total} access logs.")
+    return total
@@ -1,18 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import health, verify, enroll, logs
-from app.db import models
-from app.db.database import engine
-from app.core.face_utils import preload_models
-import threading
+from app.api.routers import include_routers
+from app.core.startup import lifespan
+from app.core.request_context import RequestContextMiddleware
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="Face Access System API")
-
-# Pre-load models in a background thread to not block startup
-threading.Thread(target=preload_models, daemon=True).start()
+# Startup (database migrations, gallery, model warm-up) and shutdown (access log flush)
+app = FastAPI(title="Face Access System API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -21,13 +14,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Request-ID"], # Pagination cursors, request IDs
 )
+# Request IDs, request latency metrics and structured request logs
+app.add_middleware(RequestContextMiddleware)
 
-# Include Routers
-app.include_router(health.router, prefix="/api", tags=["Health"])
-app.include_router(verify.router, prefix="/api", tags=["Access"])
-app.include_router(enroll.router, prefix="/api", tags=["Enroll"])
-app.include_router(logs.router, prefix="/api", tags=["Logs"])
+# Include Routers (shared with the root main.py)
+include_routers(app)
 
 @app.get("/")
 async def root():
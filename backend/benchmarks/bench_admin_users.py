@@ -0,0 +1,67 @@
+"""
+Benchmarks the admin user listing on a synthetic users table (50k users by default):
+the old "load every User row, embeddings included" query against one keyset page.
+
+Run from the `backend` folder (uses a throwaway SQLite file in the temp dir):
+    python -m benchmarks.bench_admin_users [num_users]
+"""
+import os
+import sys
+import tempfile
+import time
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.api.admin import query_users
+
+
+def populate(session, num_users, chunk=10_000):
+    embedding = os.urandom(512)
+    for offset in range(0, num_users, chunk):
+        session.execute(insert(models.User), [
+            {"name": f"user_{i:07d}", "face_embedding": embedding, "embedding_dim": 128}
+            for i in range(offset, min(offset + chunk, num_users))
+        ])
+    session.commit()
+
+
+def timed(label, fn, repeats=10):
+    fn()  # warm caches
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    print(f"{label:<42} {(time.perf_counter() - start) / repeats * 1000:>8.2f} ms")
+
+
+def run_benchmark(num_users=50_000):
+    path = os.path.join(tempfile.gettempdir(), "bench_admin_users.db")
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    populate(session, num_users)
+    print(f"Inserted {num_users} users\n")
+
+    # Cursor deep into the table
+    cursor = None
+    for _ in range(100):
+        _, cursor = query_users(session, 100, cursor)
+
+    def legacy():
+        session.expunge_all()
+        return session.query(models.User).all()
+
+    timed("legacy: all users with embeddings", legacy)
+    timed("keyset: first page", lambda: query_users(session, 100))
+    timed("keyset: page 100", lambda: query_users(session, 100, cursor))
+    timed("keyset: prefix 'user_00123'", lambda: query_users(session, 100, prefix="user_00123"))
+
+    session.close()
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
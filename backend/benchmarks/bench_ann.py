@@ -0,0 +1,60 @@
+"""
+Recall@1 / latency report of the IVF gallery index against exact search.
+Use it to pick GALLERY_IVF_NLIST / GALLERY_IVF_NPROBE for a deployment.
+
+Run from the `backend` folder:
+    python -m benchmarks.bench_ann [num_identities ...]
+"""
+import sys
+import time
+import numpy as np
+
+from app.core.gallery import GalleryIndex, IVFGalleryIndex, EMBEDDING_DIM
+
+
+def synthetic_gallery(size, rng, num_groups=2_000, spread=0.6):
+    """Clustered embeddings (people who look alike) are closer to real Facenet data than pure noise."""
+    groups = rng.standard_normal((num_groups, EMBEDDING_DIM)).astype(np.float32)
+    members = rng.integers(0, num_groups, size)
+    return groups[members] + spread * rng.standard_normal((size, EMBEDDING_DIM)).astype(np.float32)
+
+
+def measure(index, probes):
+    results = []
+    start = time.perf_counter()
+    for probe in probes:
+        results.append(index.search(probe, threshold=2.0)[0])
+    latency_ms = (time.perf_counter() - start) / len(probes) * 1000
+    return np.array(results), latency_ms
+
+
+def run_report(sizes=(10_000, 100_000), nprobes=(1, 2, 4, 8, 16, 32), num_probes=500, seed=0):
+    rng = np.random.default_rng(seed)
+    for size in sizes:
+        embeddings = synthetic_gallery(size, rng)
+        ids = np.arange(size)
+        probes = embeddings[rng.integers(0, size, num_probes)]
+        probes = probes + 0.3 * rng.standard_normal(probes.shape).astype(np.float32)
+
+        exact = GalleryIndex()
+        exact.rebuild(ids, embeddings)
+        truth, exact_ms = measure(exact, probes)
+
+        ivf = IVFGalleryIndex(min_train_size=0)
+        start = time.perf_counter()
+        ivf.rebuild(ids, embeddings)
+        train_s = time.perf_counter() - start
+
+        print(f"\n{size} identities | exact: {exact_ms:.3f} ms/probe | IVF nlist={len(ivf._lists)} trained in {train_s:.1f}s")
+        print(f"{'nprobe':>7} | {'recall@1':>8} | {'ms/probe':>9} | {'speedup':>8}")
+        print("-" * 42)
+        for nprobe in nprobes:
+            ivf.nprobe = nprobe
+            found, ivf_ms = measure(ivf, probes)
+            recall = float(np.mean(found == truth))
+            print(f"{nprobe:>7} | {recall:>8.3f} | {ivf_ms:>9.3f} | {exact_ms / ivf_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    sizes = tuple(int(a) for a in sys.argv[1:]) or (10_000, 100_000)
+    run_report(sizes)
@@ -0,0 +1,66 @@
+"""
+Latency and detection-rate comparison of the face detector backends on a local image set.
+Frames are downscaled to DETECTION_MAX_DIM first, exactly like detect_face does.
+
+Run from the `backend` folder:
+    python -m benchmarks.bench_detectors path/to/frames [haar yunet res10]
+
+Images in the folder are assumed to contain one face each, so "detected" is the share of
+frames with at least one face and "multi" (more than one box) hints at false positives.
+"""
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.core.detectors import create_detector
+
+
+def load_frames(image_dir):
+    frames = []
+    for name in sorted(os.listdir(image_dir)):
+        if not name.lower().endswith((".jpg", ".jpeg", ".png")):
+            continue
+        img = cv2.imread(os.path.join(image_dir, name))
+        if img is None:
+            continue
+        height, width = img.shape[:2]
+        scale = settings.DETECTION_MAX_DIM / max(height, width)
+        if scale < 1.0:
+            img = cv2.resize(img, (int(width * scale), int(height * scale)))
+        frames.append(img)
+    return frames
+
+
+def run_benchmark(image_dir, names=("haar", "yunet", "res10")):
+    frames = load_frames(image_dir)
+    if not frames:
+        print(f"No images found in {image_dir}")
+        return
+    print(f"{len(frames)} frames, max dim {settings.DETECTION_MAX_DIM}px, min face {settings.DETECTOR_MIN_FACE_SIZE}px\n")
+    print(f"{'detector':>9} | {'mean ms':>8} | {'p95 ms':>7} | {'detected':>8} | {'multi':>6}")
+    print("-" * 50)
+    for name in names:
+        detector = create_detector(name)
+        if detector.name != name:
+            # Model file missing, create_detector fell back to Haar
+            continue
+        detector.detect(frames[0])  # warm-up
+        latencies, counts = [], []
+        for frame in frames:
+            start = time.perf_counter()
+            boxes = detector.detect(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+            counts.append(len(boxes))
+        counts = np.array(counts)
+        print(f"{name:>9} | {np.mean(latencies):>8.2f} | {np.percentile(latencies, 95):>7.2f} | "
+              f"{np.mean(counts > 0):>8.1%} | {np.mean(counts > 1):>6.1%}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    run_benchmark(sys.argv[1], tuple(sys.argv[2:]) or ("haar", "yunet", "res10"))
@@ -0,0 +1,36 @@
+"""
+Compares storage size and cold-load time of JSON vs binary face embeddings.
+
+Run from the `backend` folder:
+    python -m benchmarks.bench_embedding_storage
+"""
+import json
+import time
+import numpy as np
+
+from app.db.embeddings import encode_embedding, decode_embedding_matrix
+
+
+def run_benchmark(sizes=(1_000, 10_000, 100_000), dim=128, seed=0):
+    rng = np.random.default_rng(seed)
+    print(f"{'rows':>8} | {'format':>8} | {'bytes/row':>9} | {'load ms':>8}")
+    print("-" * 44)
+    for size in sizes:
+        embeddings = rng.standard_normal((size, dim)).astype(np.float32)
+
+        as_json = [json.dumps(row) for row in embeddings.tolist()]
+        start = time.perf_counter()
+        np.array([json.loads(row) for row in as_json], dtype=np.float32)
+        json_ms = (time.perf_counter() - start) * 1000
+        print(f"{size:>8} | {'json':>8} | {sum(map(len, as_json)) / size:>9.0f} | {json_ms:>8.1f}")
+
+        for dtype in ("float32", "float16"):
+            blobs = [encode_embedding(row, dtype)[0] for row in embeddings]
+            start = time.perf_counter()
+            decode_embedding_matrix(blobs, dim, dtype)
+            blob_ms = (time.perf_counter() - start) * 1000
+            print(f"{size:>8} | {dtype:>8} | {len(blobs[0]):>9} | {blob_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
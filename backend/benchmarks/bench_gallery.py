@@ -0,0 +1,70 @@
+"""
+Compares the legacy per-row verify loop with the in-memory GalleryIndex.
+
+Run from the `backend` folder:
+    python -m benchmarks.bench_gallery
+"""
+import time
+import numpy as np
+
+from app.core.gallery import GalleryIndex, EMBEDDING_DIM
+
+
+def legacy_verify_face(probe_embedding, registered_embeddings, threshold=0.4):
+    """The original Python loop from face_utils.verify_face, kept here as the baseline."""
+    if not registered_embeddings:
+        return None, 1.0
+
+    probe_embedding = np.array(probe_embedding)
+    best_dist = 1.0
+    best_idx = -1
+
+    for i, reg_emb in enumerate(registered_embeddings):
+        reg_emb = np.array(reg_emb)
+        dist = 1 - (np.dot(probe_embedding, reg_emb) / (np.linalg.norm(probe_embedding) * np.linalg.norm(reg_emb)))
+        if dist < best_dist:
+            best_dist = dist
+            best_idx = i
+
+    if best_dist < threshold:
+        return best_idx, float(best_dist)
+    return None, float(best_dist)
+
+
+def time_per_call(fn, probes):
+    start = time.perf_counter()
+    for probe in probes:
+        fn(probe)
+    return (time.perf_counter() - start) / len(probes) * 1000
+
+
+def run_benchmark(sizes=(1_000, 10_000, 100_000), num_probes=20, seed=0):
+    rng = np.random.default_rng(seed)
+    print(f"{'identities':>10} | {'loop ms/probe':>14} | {'index ms/probe':>15} | {'build ms':>9} | {'speedup':>8}")
+    print("-" * 68)
+    for size in sizes:
+        embeddings = rng.standard_normal((size, EMBEDDING_DIM)).astype(np.float32)
+        # The request path used to see JSON-decoded Python lists
+        as_lists = embeddings.tolist()
+        # Probes are noisy copies of enrolled identities so both paths find a match
+        targets = rng.integers(0, size, num_probes)
+        probes = embeddings[targets] + 0.05 * rng.standard_normal((num_probes, EMBEDDING_DIM)).astype(np.float32)
+
+        start = time.perf_counter()
+        index = GalleryIndex()
+        index.rebuild(np.arange(size), embeddings)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # The loop gets very slow at 100k, so it only sees a few probes
+        loop_probes = probes[:max(1, num_probes // (size // 1_000))]
+        loop_ms = time_per_call(lambda p: legacy_verify_face(p.tolist(), as_lists), loop_probes)
+        index_ms = time_per_call(index.search, probes)
+
+        for probe, target in zip(probes[:len(loop_probes)], targets):
+            assert index.search(probe)[0] == legacy_verify_face(probe.tolist(), as_lists)[0] == target
+
+        print(f"{size:>10} | {loop_ms:>14.2f} | {index_ms:>15.3f} | {build_ms:>9.1f} | {loop_ms / index_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    run_benchmark()
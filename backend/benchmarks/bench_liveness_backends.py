@@ -0,0 +1,91 @@
+"""
+Parity, latency and memory comparison of the Keras and ONNX Runtime liveness backends.
+Needs both ml_model/liveness_model.h5 and ml_model/liveness_model.onnx
+(see ml_model/scripts/export_onnx.py).
+
+Run from the `backend` folder:
+    python -m benchmarks.bench_liveness_backends [face_image_dir]
+
+Exits with a non-zero status if the two backends disagree on any score.
+The parity check also runs as tests/test_liveness_parity.py, skipped when a model file is missing.
+"""
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+
+from app.core.liveness_utils import load_liveness_model, preprocess_face
+
+BACKENDS = ("keras", "onnx")
+TOLERANCE = 1e-4
+
+
+def load_faces(image_dir=None, count=64, seed=0):
+    """Preprocessed faces from a directory of crops, or random images if none is given."""
+    if image_dir:
+        import cv2
+        names = sorted(f for f in os.listdir(image_dir) if f.lower().endswith((".jpg", ".jpeg", ".png")))[:count]
+        images = [cv2.imread(os.path.join(image_dir, n)) for n in names]
+        images = [img for img in images if img is not None]
+    else:
+        rng = np.random.default_rng(seed)
+        images = [rng.integers(0, 256, (240, 200, 3), dtype=np.uint8) for _ in range(count)]
+    return np.stack([preprocess_face(img) for img in images])
+
+
+def check_parity(faces):
+    models = {name: load_liveness_model(name) for name in BACKENDS}
+    missing = [name for name, model in models.items() if model is None]
+    if missing:
+        print(f"Cannot compare, backend(s) unavailable: {', '.join(missing)}")
+        return False
+    scores = {name: model.predict(faces).reshape(-1) for name, model in models.items()}
+    diff = np.abs(scores["keras"] - scores["onnx"])
+    decisions_match = np.array_equal(scores["keras"] < 0.2, scores["onnx"] < 0.2)
+    print(f"Parity on {len(faces)} faces: max |diff| = {diff.max():.2e}, mean = {diff.mean():.2e}, "
+          f"same live/spoof decisions: {decisions_match}")
+    return bool(diff.max() <= TOLERANCE and decisions_match)
+
+
+def measure_backend(backend, faces, repeats=20):
+    """Runs in a fresh process so load time and RSS are not polluted by the other backend."""
+    start = time.perf_counter()
+    model = load_liveness_model(backend)
+    load_s = time.perf_counter() - start
+    model.predict(faces[:1])  # warm-up
+
+    latencies = {}
+    for batch_size in (1, 8, 16):
+        batch = faces[:batch_size]
+        start = time.perf_counter()
+        for _ in range(repeats):
+            model.predict(batch)
+        latencies[batch_size] = (time.perf_counter() - start) / repeats * 1000
+
+    try:
+        import resource
+        # ru_maxrss is in KiB on Linux
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        rss_mb = float("nan")
+
+    row = " | ".join(f"{latencies[b]:>8.2f}" for b in (1, 8, 16))
+    print(f"{backend:>6} | {load_s:>7.2f} | {rss_mb:>9.0f} | {row}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--measure":
+        measure_backend(sys.argv[2], load_faces(sys.argv[3] if len(sys.argv) > 3 else None))
+        sys.exit(0)
+
+    image_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    ok = check_parity(load_faces(image_dir))
+
+    print(f"\n{'':>6} | {'load s':>7} | {'peak RSS MB':>9} | {'ms @ 1':>8} | {'ms @ 8':>8} | {'ms @ 16':>8}")
+    print("-" * 64)
+    for backend in BACKENDS:
+        args = [sys.executable, "-m", "benchmarks.bench_liveness_backends", "--measure", backend]
+        subprocess.run(args + ([image_dir] if image_dir else []), check=False)
+
+    sys.exit(0 if ok else 1)
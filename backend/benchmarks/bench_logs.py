@@ -0,0 +1,101 @@
+"""
+Benchmarks /api/logs queries on a synthetic access_logs table (1M rows by default):
+the old "50 logs + one User query per row" loop against the joined keyset query.
+
+Run from the `backend` folder (uses a throwaway SQLite file in the temp dir):
+    python -m benchmarks.bench_logs [num_rows]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.api.logs import query_access_logs
+
+NUM_USERS = 2_000
+STATUSES = np.array(["granted", "denied", "spoof"])
+
+
+def populate(session, num_rows, seed=0, chunk=50_000):
+    rng = np.random.default_rng(seed)
+    session.execute(insert(models.User), [
+        {"id": i, "name": f"user_{i}", "face_embedding": b"\0" * 512, "embedding_dim": 128}
+        for i in range(1, NUM_USERS + 1)
+    ])
+    start = datetime(2025, 1, 1)
+    for offset in range(0, num_rows, chunk):
+        size = min(chunk, num_rows - offset)
+        seconds = np.sort(rng.integers(0, 365 * 24 * 3600, size))
+        session.execute(insert(models.AccessLog), [
+            {
+                "user_id": int(u),
+                "status": str(s),
+                "match_confidence": int(c),
+                "timestamp": start + timedelta(seconds=int(t)),
+            }
+            for u, s, c, t in zip(
+                rng.integers(1, NUM_USERS + 1, size),
+                STATUSES[rng.integers(0, 3, size)],
+                rng.integers(40, 100, size),
+                seconds,
+            )
+        ])
+    session.commit()
+
+
+def legacy_query(db):
+    """The original get_access_logs body."""
+    logs = db.query(models.AccessLog).order_by(models.AccessLog.timestamp.desc()).limit(50).all()
+    result = []
+    for log in logs:
+        user = db.query(models.User).filter(models.User.id == log.user_id).first()
+        result.append((log.id, user.name if user else "Unknown"))
+    return result
+
+
+def timed(label, fn, repeats=20):
+    fn()  # warm caches
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    print(f"{label:<42} {(time.perf_counter() - start) / repeats * 1000:>8.2f} ms")
+
+
+def run_benchmark(num_rows=1_000_000):
+    path = os.path.join(tempfile.gettempdir(), "bench_access_logs.db")
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    start = time.perf_counter()
+    populate(session, num_rows)
+    print(f"Inserted {num_rows} access logs in {time.perf_counter() - start:.1f}s\n")
+
+    # Walk 200 pages deep to get a cursor far into the table
+    cursor = None
+    for _ in range(200):
+        _, cursor = query_access_logs(session, 50, cursor)
+
+    window = (datetime(2025, 6, 1), datetime(2025, 6, 8))
+    timed("legacy: 50 logs + 50 user lookups", lambda: legacy_query(session))
+    timed("keyset: first page", lambda: query_access_logs(session, 50))
+    timed("keyset: page 200", lambda: query_access_logs(session, 50, cursor))
+    timed("keyset: one user", lambda: query_access_logs(session, 50, user_id=42))
+    timed("keyset: status=spoof", lambda: query_access_logs(session, 50, status="spoof"))
+    timed("keyset: one week window", lambda: query_access_logs(session, 50, start=window[0], end=window[1]))
+    timed("keyset: one user, spoof, one week", lambda: query_access_logs(session, 50, user_id=42, status="spoof", start=window[0], end=window[1]))
+
+    session.close()
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
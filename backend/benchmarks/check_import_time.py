@@ -0,0 +1,90 @@
+"""
+Import-time budget check for the parts of the backend that must start fast.
+
+The DB layer and the admin/logs/health routers must import without the ML stack: no
+TensorFlow, DeepFace, PyTorch, ONNX Runtime or OpenCV. Each target is imported in a fresh
+interpreter under `python -X importtime`; the check fails (exit code 1) if a forbidden
+module shows up or the cumulative import time exceeds the budget.
+
+Run from the `backend` folder:
+    python -m benchmarks.check_import_time [--budget-ms 1500] [--top 10]
+
+The same check runs under pytest as tests/test_import_time.py.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+TARGETS = {
+    "db layer": ["app.db.database", "app.db.models", "app.db.migrations", "app.db.stats", "app.db.log_writer"],
+    "admin/logs/health routers": ["app.api.admin", "app.api.logs", "app.api.stats", "app.api.health", "app.api.metrics"],
+}
+
+# Top-level packages that belong behind the inference layer
+FORBIDDEN = ("tensorflow", "keras", "tf_keras", "deepface", "torch", "torchvision", "onnxruntime", "onnx", "cv2")
+
+DEFAULT_BUDGET_MS = 1500.0
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(modules):
+    """Imports modules in a fresh interpreter. Returns {module: (depth, self_us, cumulative_us)}."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=backend_dir,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if line.strip() and not _LINE.match(line)]
+        raise RuntimeError(errors[-1] if errors else "import failed")
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            # Two spaces of indentation per nesting level below the top-level import
+            timings[name] = ((len(indent) - 1) // 2, int(self_us), int(cumulative_us))
+    return timings
+
+
+def summarize(timings):
+    """Returns (cumulative top-level import time in ms, sorted forbidden modules imported)."""
+    total_ms = sum(cum for depth, _, cum in timings.values() if depth == 0) / 1000.0
+    forbidden = sorted({name for name in timings if name.split(".")[0] in FORBIDDEN})
+    return total_ms, forbidden
+
+
+def check(label, modules, budget_ms, top):
+    try:
+        timings = measure(modules)
+    except RuntimeError as e:
+        print(f"FAIL {label}: {e}")
+        return False
+    total_ms, forbidden = summarize(timings)
+
+    ok = total_ms <= budget_ms and not forbidden
+    print(f"{'ok  ' if ok else 'FAIL'} {label}: {total_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+    if forbidden:
+        print(f"     imports forbidden modules: {', '.join(forbidden)}")
+    slowest = sorted(((cum, name) for name, (depth, _, cum) in timings.items() if depth == 0), reverse=True)[:top]
+    for cum, name in slowest:
+        print(f"     {cum / 1000.0:>8.1f} ms  {name}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Cumulative import time allowed per target")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+    args = parser.parse_args(argv)
+    results = [check(label, modules, args.budget_ms, args.top) for label, modules in TARGETS.items()]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
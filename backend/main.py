@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+from app.core.startup import lifespan
+
+# Same startup (migrations, gallery, model warm-up) and shutdown (log flush) as app/main.py
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -9,22 +12,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Request-ID"], # Pagination cursors, request IDs
 )
 
-from app.api import enroll, verify
+from app.core.request_context import RequestContextMiddleware
+app.add_middleware(RequestContextMiddleware)
+
 from fastapi.staticfiles import StaticFiles
 import os
 
-app.include_router(enroll.router, prefix="/api", tags=["Enrollment"])
-app.include_router(verify.router, prefix="/api", tags=["Verification"])
-
-from app.api import admin
-app.include_router(admin.router, prefix="/api", tags=["Admin"])
+# Same router list as app/main.py
+from app.api.routers import include_routers
+include_routers(app)
 
 # Ensure data directory exists
 os.makedirs("data/faces", exist_ok=True)
 
-# Mount static directory to serve face images
+# Mount static directory to serve face images saved before the content-addressed store
 app.mount("/static", StaticFiles(directory="data"), name="static")
 
 @app.get("/")
@@ -0,0 +1,80 @@
+"""
+Exports the Facenet model DeepFace uses to backend/ml_model/facenet.onnx and checks it
+against DeepFace.represent.
+
+Needs TensorFlow and tf2onnx, which the backend itself does not:
+    pip install -r backend/requirements-export.txt
+
+Run from the repository root:
+    python backend/ml_model/scripts/export_facenet_onnx.py
+"""
+import tensorflow as tf
+import tf2onnx
+import numpy as np
+import os
+
+def export_facenet_to_onnx(onnx_path, model_name="Facenet"):
+    """
+    Converts the Facenet model DeepFace uses to ONNX format,
+    so the backend can embed faces with ONNX Runtime instead of TensorFlow.
+    """
+    from deepface import DeepFace
+
+    client = DeepFace.build_model(model_name)
+    # DeepFace clients wrap the Keras model; older DeepFace versions return it directly
+    model = getattr(client, "model", client)
+    height, width = getattr(client, "input_shape", (160, 160))
+
+    # Dynamic batch dimension so the server can run batched forward passes
+    spec = (tf.TensorSpec((None, height, width, 3), tf.float32, name="input"),)
+
+    print(f"Converting {model_name} to ONNX...")
+
+    model_proto, _ = tf2onnx.convert.from_keras(model, input_signature=spec, opset=13)
+
+    # Save ONNX model
+    with open(onnx_path, "wb") as f:
+        f.write(model_proto.SerializeToString())
+
+    print(f"Model exported successfully to {onnx_path}")
+    return model
+
+def check_equivalence(onnx_path, model_name="Facenet", num_faces=8, tolerance=1e-4):
+    """
+    Compares DeepFace.represent(..., detector_backend='skip') with the ONNX export
+    run through the backend's own preprocessing, on random face-sized images.
+    """
+    import onnxruntime as ort
+    from deepface import DeepFace
+    from app.core.embedding_utils import preprocess_face
+
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+    height, width = session.get_inputs()[0].shape[1:3]
+
+    rng = np.random.default_rng(0)
+    faces = [rng.integers(0, 256, (180 + 10 * i, 150, 3), dtype=np.uint8) for i in range(num_faces)]
+
+    expected = np.array([
+        DeepFace.represent(img_path=face, model_name=model_name, enforce_detection=False, detector_backend='skip')[0]["embedding"]
+        for face in faces
+    ])
+    batch = np.stack([preprocess_face(face, (height, width)) for face in faces])
+    actual = session.run(None, {input_name: batch})[0]
+
+    max_diff = float(np.abs(expected - actual).max())
+    print(f"Max difference vs DeepFace.represent over {num_faces} faces: {max_diff:.2e}")
+    if max_diff > tolerance:
+        print("WARNING: ONNX embeddings differ from DeepFace beyond tolerance.")
+    return max_diff <= tolerance
+
+if __name__ == "__main__":
+    import sys
+    # Run from the repository root; the backend package is needed for the equivalence check
+    sys.path.insert(0, 'backend')
+
+    ONNX_PATH = 'backend/ml_model/facenet.onnx'
+
+    export_facenet_to_onnx(ONNX_PATH)
+    if os.path.exists(ONNX_PATH):
+        check_equivalence(ONNX_PATH)
@@ -1,23 +1,39 @@
 import cv2
 import os
 import numpy as np
-import random
-import shutil
+import json
+import time
+import hashlib
+import argparse
+from multiprocessing import Pool, cpu_count
 
-def preprocess_face(image_path, target_size=(224, 224)):
+CATEGORIES = ['real', 'spoof']
+PHASES = ['train', 'val', 'test']
+IMAGE_EXTENSIONS = ('.jpg', '.png', '.jpeg')
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# One cascade per worker process, created by the pool initializer
+_face_cascade = None
+
+def _init_worker():
+    global _face_cascade
+    # Each worker runs single-threaded OpenCV; the pool provides the parallelism
+    cv2.setNumThreads(1)
+    _face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+
+def preprocess_face(img, target_size=(224, 224), face_cascade=None):
     """
-    Load an image, detect the face, crop it with padding, and resize it.
+    Detect the face in a BGR image, crop it with padding, and resize it.
     """
-    # Load Haar Cascade
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-    
-    img = cv2.imread(image_path)
-    if img is None:
-        return None
-        
+    face_cascade = face_cascade or _face_cascade
+    if face_cascade is None:
+        _init_worker()
+        face_cascade = _face_cascade
+
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     faces = face_cascade.detectMultiScale(gray, 1.1, 4)
-    
+
     # If no face is detected, we take a center crop to avoid losing data
     if len(faces) == 0:
         h, w = img.shape[:2]
@@ -28,7 +44,7 @@ def preprocess_face(image_path, target_size=(224, 224)):
     else:
         # Pick the largest face detected
         x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
-        
+
         # Add 20% padding around the face for context (hair, ears)
         padding_w = int(0.2 * w)
         padding_h = int(0.2 * h)
@@ -37,68 +53,194 @@ def preprocess_face(image_path, target_size=(224, 224)):
         x1 = max(0, x - padding_w)
         x2 = min(img.shape[1], x + w + padding_w)
         face_roi = img[y1:y2, x1:x2]
-    
+
     # Resize to model input size
-    face_img = cv2.resize(face_roi, target_size)
-    
-    return face_img
+    return cv2.resize(face_roi, target_size)
 
-def split_and_preprocess(raw_dir, processed_dir, train_ratio=0.7, val_ratio=0.15):
+def assign_split(key, seed, train_ratio, val_ratio):
     """
-    Splits raw images into Train, Val, and Test sets and preprocesses them.
-    Defaults to 70% Train, 15% Val, 15% Test.
+    Deterministic train/val/test assignment from a seeded hash of the image's relative path.
+    Unlike shuffling, adding images never moves existing ones to another split.
+    """
+    digest = hashlib.sha256(f"{seed}:{key}".encode()).digest()
+    fraction = int.from_bytes(digest[:8], 'big') / 2 ** 64
+    if fraction < train_ratio:
+        return 'train'
+    if fraction < train_ratio + val_ratio:
+        return 'val'
+    return 'test'
+
+def _process_task(task):
     """
-    if os.path.exists(processed_dir):
-        print(f"Cleaning existing directory: {processed_dir}")
-        shutil.rmtree(processed_dir)
-        
-    for category in ['real', 'spoof']:
+    Worker: hash the raw bytes, and unless the manifest already has this exact content
+    processed, detect/crop/resize and write the output. Returns the new manifest entry.
+    """
+    key, src, category, phase, previous, target_size, processed_dir = task
+    stat = os.stat(src)
+    with open(src, 'rb') as f:
+        data = f.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+    output = f"{phase}/{category}/{category}_{content_hash[:16]}.jpg"
+    entry = {'hash': content_hash, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'output': output}
+
+    if previous and previous.get('hash') == content_hash and previous.get('output') == output \
+            and os.path.exists(os.path.join(processed_dir, output)):
+        # Only the timestamp changed
+        return key, entry, 'unchanged'
+
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        entry['output'] = None
+        return key, entry, 'failed'
+    face = preprocess_face(img, target_size)
+    dst = os.path.join(processed_dir, output)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = f"{dst}.{os.getpid()}.tmp.jpg"
+    cv2.imwrite(tmp, face)
+    os.replace(tmp, dst)
+    return key, entry, 'processed'
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"Ignoring unreadable manifest {path}")
+        return None
+
+def save_manifest(path, manifest):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def list_raw_images(raw_dir):
+    """(key, path, category) for every raw image, key being 'category/relative/path'."""
+    images = []
+    for category in CATEGORIES:
         raw_category_path = os.path.join(raw_dir, category)
         if not os.path.exists(raw_category_path):
             print(f"Skipping {category}: Directory not found.")
             continue
-            
-        images = [f for f in os.listdir(raw_category_path) if f.lower().endswith(('.jpg', '.png', '.jpeg'))]
-        random.shuffle(images)
-        
-        # Calculate split indices
-        num_images = len(images)
-        train_end = int(num_images * train_ratio)
-        val_end = train_end + int(num_images * val_ratio)
-        
-        splits = {
-            'train': images[:train_end],
-            'val': images[train_end:val_end],
-            'test': images[val_end:]
-        }
-        
-        for phase, img_list in splits.items():
+        for root, _, files in os.walk(raw_category_path):
+            for name in files:
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    path = os.path.join(root, name)
+                    rel = os.path.relpath(path, raw_category_path).replace(os.sep, '/')
+                    images.append((f"{category}/{rel}", path, category))
+    images.sort()
+    return images
+
+def remove_stale_outputs(processed_dir, entries):
+    """Deletes processed images that no manifest entry points to (removed or changed raw images)."""
+    expected = {os.path.normpath(e['output']) for e in entries.values() if e.get('output')}
+    removed = 0
+    for phase in PHASES:
+        for category in CATEGORIES:
             phase_path = os.path.join(processed_dir, phase, category)
-            os.makedirs(phase_path, exist_ok=True)
-            
-            print(f"Processing {len(img_list)} images for {phase}/{category}...")
-            
-            for i, img_name in enumerate(img_list):
-                src = os.path.join(raw_category_path, img_name)
-                dst = os.path.join(phase_path, f"{category}_{i}.jpg")
-                
-                face = preprocess_face(src)
-                if face is not None:
-                    cv2.imwrite(dst, face)
-                
-                if (i + 1) % 100 == 0:
-                    print(f"  > {i + 1} images done...")
+            if not os.path.isdir(phase_path):
+                continue
+            for name in os.listdir(phase_path):
+                rel = os.path.normpath(os.path.join(phase, category, name))
+                if rel not in expected:
+                    os.remove(os.path.join(processed_dir, rel))
+                    removed += 1
+    return removed
+
+def split_and_preprocess(raw_dir, processed_dir, train_ratio=0.7, val_ratio=0.15, seed=42,
+                         target_size=(224, 224), workers=None, chunksize=32, force=False):
+    """
+    Splits raw images into Train, Val, and Test sets and preprocesses them.
+    Defaults to 70% Train, 15% Val, 15% Test.
+
+    Incremental: a content-hash manifest in processed_dir records what each raw image produced,
+    so reruns only process new or changed images and delete outputs of removed ones. Changing
+    the seed, ratios or target size (or passing force=True) reprocesses everything.
+    """
+    os.makedirs(processed_dir, exist_ok=True)
+    manifest_path = os.path.join(processed_dir, MANIFEST_NAME)
+    config = {
+        'version': MANIFEST_VERSION,
+        'seed': seed,
+        'train_ratio': train_ratio,
+        'val_ratio': val_ratio,
+        'target_size': list(target_size),
+    }
+    manifest = load_manifest(manifest_path)
+    previous_entries = {}
+    if manifest and manifest.get('config') == config and not force:
+        previous_entries = manifest.get('entries', {})
+    elif manifest:
+        print("Preprocessing settings changed (or --force): reprocessing everything.")
+
+    entries = {}
+    tasks = []
+    for key, path, category in list_raw_images(raw_dir):
+        previous = previous_entries.get(key)
+        stat = os.stat(path)
+        if previous and previous.get('size') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns \
+                and (previous.get('output') is None or os.path.exists(os.path.join(processed_dir, previous['output']))):
+            # Unchanged since the last run: skip without even reading it
+            entries[key] = previous
+            continue
+        phase = assign_split(key, seed, train_ratio, val_ratio)
+        tasks.append((key, path, category, phase, previous, tuple(target_size), processed_dir))
+
+    up_to_date = len(entries)
+    print(f"{up_to_date + len(tasks)} raw images: {up_to_date} up to date, {len(tasks)} to check/process.")
+
+    counts = {'processed': 0, 'unchanged': 0, 'failed': 0}
+    if tasks:
+        workers = workers or cpu_count()
+        start = time.time()
+        last_report = start
+        with Pool(processes=workers, initializer=_init_worker) as pool:
+            for done, (key, entry, status) in enumerate(pool.imap_unordered(_process_task, tasks, chunksize=chunksize), 1):
+                entries[key] = entry
+                counts[status] += 1
+                now = time.time()
+                if now - last_report >= 2.0 or done == len(tasks):
+                    rate = done / max(now - start, 1e-9)
+                    eta = (len(tasks) - done) / rate if rate else 0.0
+                    print(f"  > {done}/{len(tasks)} images ({rate:.0f}/s, ETA {eta:.0f}s)")
+                    last_report = now
+                    # Checkpoint so an interrupted run resumes where it stopped
+                    save_manifest(manifest_path, {'config': config, 'entries': entries})
+
+    removed = remove_stale_outputs(processed_dir, entries)
+    save_manifest(manifest_path, {'config': config, 'entries': entries})
+
+    per_split = {}
+    for entry in entries.values():
+        if entry.get('output'):
+            phase, category = entry['output'].split('/')[:2]
+            per_split[f"{phase}/{category}"] = per_split.get(f"{phase}/{category}", 0) + 1
+    print(f"Processed {counts['processed']}, unchanged {counts['unchanged'] + up_to_date}, "
+          f"unreadable {counts['failed']}, stale outputs removed {removed}.")
+    for split, n in sorted(per_split.items()):
+        print(f"  {split}: {n}")
+    return counts
 
 if __name__ == "__main__":
-    import time
+    parser = argparse.ArgumentParser(description="Crop faces from the raw liveness dataset into train/val/test splits.")
+    parser.add_argument('--raw', default='backend/ml_model/data/raw')
+    parser.add_argument('--out', default='backend/ml_model/data/processed')
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--chunksize', type=int, default=32, help="Images handed to a worker at a time")
+    parser.add_argument('--seed', type=int, default=42, help="Seed of the deterministic split")
+    parser.add_argument('--train-ratio', type=float, default=0.7)
+    parser.add_argument('--val-ratio', type=float, default=0.15)
+    parser.add_argument('--force', action='store_true', help="Reprocess every image")
+    args = parser.parse_args()
+
     start_time = time.time()
-    
-    RAW_PATH = 'backend/ml_model/data/raw'
-    PROC_PATH = 'backend/ml_model/data/processed'
-    
+
     print("--- Starting Advanced Preprocessing ---")
-    split_and_preprocess(RAW_PATH, PROC_PATH)
-    
+    split_and_preprocess(args.raw, args.out, args.train_ratio, args.val_ratio, seed=args.seed,
+                         workers=args.workers, chunksize=args.chunksize, force=args.force)
+
     duration = time.time() - start_time
     print(f"\n--- Processing Complete in {duration:.2f}s ---")
-    print(f"Data is ready in: {PROC_PATH}")
+    print(f"Data is ready in: {args.out}")
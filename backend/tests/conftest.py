@@ -0,0 +1,18 @@
+"""
+Shared test setup. Run from the `backend` folder:
+    python -m pytest tests
+
+Tests run in a scratch directory with their own SQLite database, so the relative
+data/ paths of the app never touch the real one.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+_scratch = tempfile.mkdtemp(prefix="face_access_tests_")
+os.chdir(_scratch)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_scratch, 'test.db')}")
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("starlette")
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import database
+from app.db.database import DBRunner, apply_sqlite_pragmas, check_database, engine_options
+
+
+def pragma(connection, name):
+    return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+@pytest.fixture
+def tuned_engine(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tuned.db'}"
+    engine = create_engine(url, **engine_options(url))
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    yield engine
+    engine.dispose()
+
+
+def test_file_sqlite_options_wait_for_writers_and_size_the_pool(tmp_path):
+    options = engine_options(f"sqlite:///{tmp_path / 'x.db'}")
+    assert options["connect_args"]["check_same_thread"] is False
+    assert options["connect_args"]["timeout"] == settings.SQLITE_BUSY_TIMEOUT_MS / 1000.0
+    assert options["pool_size"] == settings.DB_POOL_SIZE
+
+
+def test_memory_sqlite_gets_no_pool_options():
+    options = engine_options("sqlite:///:memory:")
+    assert "pool_size" not in options
+
+
+def test_pragmas_are_applied_on_connect(tuned_engine):
+    with tuned_engine.connect() as connection:
+        assert pragma(connection, "journal_mode").lower() == settings.SQLITE_JOURNAL_MODE.lower()
+        assert pragma(connection, "busy_timeout") == settings.SQLITE_BUSY_TIMEOUT_MS
+        assert pragma(connection, "cache_size") == -settings.SQLITE_CACHE_SIZE_KB
+        # temp_store MEMORY = 2
+        assert pragma(connection, "temp_store") == 2
+
+
+def test_check_database_reports_latency():
+    status = check_database()
+    assert status["connected"] is True
+    assert status["latency_ms"] >= 0
+
+
+def test_check_database_reports_errors(monkeypatch, tmp_path):
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'dir' / 'x.db'}")
+    monkeypatch.setattr(database, "engine", broken)
+    status = check_database()
+    assert status["connected"] is False
+    assert status["error"]
+
+
+def select_one(session, value):
+    return session.execute(text("SELECT :value"), {"value": value}).scalar()
+
+
+def test_db_runner_sync_mode(tuned_engine):
+    with Session(tuned_engine) as session:
+        runner = DBRunner(session, False)
+        assert asyncio.run(runner.run(select_one, 42)) == 42
+
+
+def test_db_runner_async_mode(tmp_path):
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+        try:
+            async with AsyncSession(engine) as session:
+                return await DBRunner(session, True).run(select_one, 7)
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(run()) == 7
@@ -0,0 +1,35 @@
+"""Both entrypoints (app/main.py and the root main.py started by run_backend.ps1) expose the same API."""
+import importlib
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+ENTRYPOINTS = ["main", "app.main"]
+
+
+def route_paths(module_name):
+    return {getattr(route, "path", None) for route in importlib.import_module(module_name).app.routes}
+
+
+@pytest.mark.parametrize("module_name", ENTRYPOINTS)
+def test_logs_listing_is_mounted(module_name):
+    assert "/api/logs" in route_paths(module_name)
+
+
+@pytest.mark.parametrize("module_name", ENTRYPOINTS)
+def test_stats_are_mounted(module_name):
+    assert "/api/stats" in route_paths(module_name)
+
+
+@pytest.mark.parametrize("module_name", ENTRYPOINTS)
+def test_live_log_stream_is_mounted(module_name):
+    assert "/api/logs/stream" in route_paths(module_name)
+
+
+def test_entrypoints_expose_the_same_routes():
+    # Only the root handlers and the legacy /static mount differ
+    own_routes = {"/", "/health", "/static"}
+    assert route_paths("main") - own_routes == route_paths("app.main") - own_routes
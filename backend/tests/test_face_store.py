@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic_settings")
+
+from app.core.face_store import encode_face_image, face_image_path, release_face_image, write_face_image
+from app.core.startup import init_database
+from app.db import models
+from app.db.database import SessionLocal
+from app.db.embeddings import set_user_embedding
+
+
+def stored_image(seed):
+    image = np.random.default_rng(seed).integers(0, 256, (120, 100, 3), dtype=np.uint8)
+    image_hash, data = encode_face_image(image)
+    return image_hash, data, image
+
+
+def test_encoding_writes_nothing_until_asked():
+    image_hash, data, image = stored_image(0)
+    assert not os.path.exists(face_image_path(image_hash))
+    write_face_image(data, image)
+    assert os.path.exists(face_image_path(image_hash))
+    assert os.path.exists(face_image_path(image_hash, thumbnail=True))
+
+
+def test_release_keeps_images_that_are_still_referenced():
+    init_database()
+    image_hash, data, image = stored_image(1)
+    write_face_image(data, image)
+    with SessionLocal() as db:
+        user = models.User(name="face-store-test-user", image_hash=image_hash)
+        set_user_embedding(user, [0.1] * 128)
+        db.add(user)
+        db.commit()
+
+        release_face_image(db, image_hash)
+        assert os.path.exists(face_image_path(image_hash))
+
+        db.delete(user)
+        db.commit()
+        release_face_image(db, image_hash)
+        assert not os.path.exists(face_image_path(image_hash))
+        assert not os.path.exists(face_image_path(image_hash, thumbnail=True))
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("sqlalchemy")
+
+from app.core.gallery import GalleryIndex, IVFGalleryIndex
+
+
+def random_embeddings(n, dim=128, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def wait_for_retrains(timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while any(t.name == "gallery-retrain" for t in threading.enumerate()):
+        assert time.monotonic() < deadline, "retrain did not finish"
+        time.sleep(0.01)
+
+
+def test_exact_index_finds_every_user():
+    vectors = random_embeddings(200)
+    index = GalleryIndex()
+    index.rebuild(np.arange(200), vectors)
+    for user_id in (0, 57, 199):
+        assert index.search(vectors[user_id])[0] == user_id
+
+
+def test_ivf_retrains_in_the_background_and_keeps_changes():
+    vectors = random_embeddings(300)
+    index = IVFGalleryIndex(nlist=8, nprobe=8, min_train_size=100)
+    index.rebuild([], np.empty((0, 128), dtype=np.float32))
+    for user_id in range(300):
+        index.add(user_id, vectors[user_id])
+    index.remove(5)
+    wait_for_retrains()
+
+    assert len(index._centroids) > 1
+    assert len(index) == 299
+    assert index.search(vectors[5])[0] != 5
+    for user_id in (0, 150, 299):
+        assert index.search(vectors[user_id])[0] == user_id
+
+
+def test_ivf_reload_reuses_the_trained_centroids():
+    vectors = random_embeddings(300)
+    index = IVFGalleryIndex(nlist=8, min_train_size=100)
+    index.rebuild(np.arange(300), vectors)
+    centroids = index._centroids
+
+    index.rebuild(np.arange(310), random_embeddings(310, seed=1))
+    assert index._centroids is centroids
+
+    # Twice the trained size: the partition is trained again
+    index.rebuild(np.arange(700), random_embeddings(700, seed=2))
+    assert index._centroids is not centroids
+
+
+def test_sync_reloads_changes_of_other_processes_in_the_background(monkeypatch):
+    from app.core import gallery as gallery_module
+    from app.core.config import settings
+    from app.core.startup import init_database
+    from app.db import models
+    from app.db.database import SessionLocal
+    from app.db.embeddings import set_user_embedding
+
+    init_database()
+    monkeypatch.setattr(settings, "GALLERY_SYNC_INTERVAL_S", 0.0)
+    with SessionLocal() as db:
+        gallery = gallery_module.load_gallery(db)
+        before = len(gallery)
+
+        # Another worker enrolls someone: only the database and the version change here
+        vector = random_embeddings(1, seed=3)[0]
+        user = models.User(name="sync-test-user")
+        set_user_embedding(user, vector.tolist())
+        db.add(user)
+        gallery_module.bump_gallery_version(db)
+        db.commit()
+
+        version = gallery_module.get_gallery_version(db)
+
+        assert gallery_module.sync_gallery(db) is gallery
+        deadline = time.monotonic() + 10
+        while gallery.version != version:
+            assert time.monotonic() < deadline, "gallery was not reloaded"
+            time.sleep(0.01)
+        assert len(gallery) == before + 1
+        assert gallery.search(vector)[0] == user.id
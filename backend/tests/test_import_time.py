@@ -0,0 +1,14 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("sqlalchemy")
+
+from benchmarks.check_import_time import DEFAULT_BUDGET_MS, TARGETS, measure, summarize
+
+
+@pytest.mark.parametrize("label", sorted(TARGETS))
+def test_target_imports_fast_without_ml_stack(label):
+    total_ms, forbidden = summarize(measure(TARGETS[label]))
+    assert not forbidden, f"{label} imports {', '.join(forbidden)}"
+    assert total_ms <= DEFAULT_BUDGET_MS, f"{label} took {total_ms:.0f} ms to import"
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("pydantic_settings")
+
+from app.core.config import settings
+from app.core.liveness_utils import MODEL_PATH, ONNX_MODEL_PATH, load_liveness_model
+from benchmarks.bench_liveness_backends import TOLERANCE, load_faces
+
+onnx_path = settings.LIVENESS_ONNX_PATH or ONNX_MODEL_PATH
+
+pytestmark = pytest.mark.skipif(
+    not (os.path.exists(MODEL_PATH) and os.path.exists(onnx_path)),
+    reason="needs ml_model/liveness_model.h5 and liveness_model.onnx",
+)
+
+
+def test_keras_and_onnx_backends_agree():
+    pytest.importorskip("tensorflow")
+    pytest.importorskip("onnxruntime")
+    keras_model = load_liveness_model("keras")
+    onnx_model = load_liveness_model("onnx")
+    assert keras_model is not None and onnx_model is not None
+
+    faces = load_faces(count=16)
+    keras_scores = keras_model.predict(faces).reshape(-1)
+    onnx_scores = onnx_model.predict(faces).reshape(-1)
+
+    np.testing.assert_allclose(onnx_scores, keras_scores, atol=TOLERANCE)
+    assert np.array_equal(keras_scores < 0.2, onnx_scores < 0.2)
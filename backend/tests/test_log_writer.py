@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic_settings")
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.db import models
+from app.db.log_writer import AccessLogWriter
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def count_logs(session_factory):
+    with session_factory() as db:
+        return db.query(func.count(models.AccessLog.id)).scalar()
+
+
+def test_stop_flushes_queued_events(session_factory):
+    writer = AccessLogWriter(session_factory, batch_size=50, flush_interval_ms=5000, prune_interval_s=0)
+    for _ in range(7):
+        writer.record("denied")
+    writer.stop()
+    assert count_logs(session_factory) == 7
+    assert writer.stats()["written"] == 7
+
+
+def test_stop_flushes_a_saturated_queue(session_factory):
+    # The writer thread is stuck in its first write long enough for stop() to find the queue full
+    release = threading.Event()
+
+    def slow_factory():
+        release.wait(5)
+        return session_factory()
+
+    writer = AccessLogWriter(slow_factory, batch_size=2, flush_interval_ms=10, max_queue_size=4, prune_interval_s=0)
+    for _ in range(10):
+        writer.record("denied")
+    dropped = writer.stats()["dropped"]
+    assert dropped > 0
+
+    threading.Timer(0.75, release.set).start()
+    writer.stop(timeout=0.5)
+
+    assert writer.stats()["queue_depth"] == 0
+    assert count_logs(session_factory) == 10 - dropped
@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("multipart")
+pytest.importorskip("pydantic_settings")
+
+from fastapi import FastAPI, File, Request, UploadFile
+from fastapi.testclient import TestClient
+
+from app.api.uploads import read_request_body, read_upload
+from app.core.config import settings
+
+MB = 1024 * 1024
+
+app = FastAPI()
+
+
+@app.post("/raw")
+async def raw(request: Request):
+    return {"size": len(await read_request_body(request))}
+
+
+@app.post("/upload")
+async def upload(file: UploadFile = File(...)):
+    return {"size": len(await read_upload(file))}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_MB", 1)
+    return TestClient(app)
+
+
+def test_raw_body_within_the_cap_is_read(client):
+    response = client.post("/raw", content=b"x" * MB)
+    assert response.status_code == 200
+    assert response.json() == {"size": MB}
+
+
+def test_raw_body_over_the_cap_is_refused(client):
+    assert client.post("/raw", content=b"x" * (MB + 1)).status_code == 413
+
+
+def test_streamed_raw_body_without_length_is_cut_off(client):
+    chunks = (b"x" * (256 * 1024) for _ in range(8))
+    assert client.post("/raw", content=chunks).status_code == 413
+
+
+def test_upload_within_the_cap_is_read(client):
+    response = client.post("/upload", files={"file": ("face.jpg", b"x" * 1000)})
+    assert response.json() == {"size": 1000}
+
+
+def test_upload_over_the_cap_is_refused(client):
+    response = client.post("/upload", files={"file": ("face.jpg", b"x" * (MB + 1))})
+    assert response.status_code == 413
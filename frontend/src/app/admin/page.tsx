@@ -2,26 +2,36 @@
 
 import React, { useEffect, useState } from 'react';
 import Link from 'next/link';
-import { Trash2, ArrowLeft, RefreshCw, UserX } from 'lucide-react';
+import { Trash2, ArrowLeft, RefreshCw, UserX, Search } from 'lucide-react';
 
 interface User {
     id: number;
     name: string;
     created_at: string;
     image_url: string;
+    thumbnail_url?: string;
 }
 
+const PAGE_SIZE = 50;
+
 export default function AdminPage() {
     const [users, setUsers] = useState<User[]>([]);
     const [loading, setLoading] = useState(true);
+    const [search, setSearch] = useState('');
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
 
-    const fetchUsers = async () => {
+    // Loads the first page, or appends the page after `cursor`
+    const fetchUsers = async (cursor: string | null = null) => {
         setLoading(true);
         try {
-            const res = await fetch('http://127.0.0.1:8000/api/users');
+            const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+            if (search.trim()) params.set('prefix', search.trim());
+            if (cursor) params.set('cursor', cursor);
+            const res = await fetch(`http://127.0.0.1:8000/api/users?${params}`);
             if (res.ok) {
                 const data = await res.json();
-                setUsers(data);
+                setUsers(cursor ? (prev) => [...prev, ...data] : data);
+                setNextCursor(res.headers.get('X-Next-Cursor'));
             } else {
                 console.error("Failed to fetch users");
             }
@@ -52,8 +62,11 @@ export default function AdminPage() {
     };
 
     useEffect(() => {
-        fetchUsers();
-    }, []);
+        // Debounce typing in the search box
+        const timer = setTimeout(() => fetchUsers(), 250);
+        return () => clearTimeout(timer);
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [search]);
 
     return (
         <main className="min-h-screen bg-[#020617] text-slate-200 p-8 sm:p-12">
@@ -66,7 +79,7 @@ export default function AdminPage() {
                         <h1 className="text-3xl font-bold text-white">Admin Dashboard</h1>
                     </div>
                     <button
-                        onClick={fetchUsers}
+                        onClick={() => fetchUsers()}
                         className="flex items-center gap-2 px-4 py-2 bg-primary/10 text-primary rounded-lg hover:bg-primary/20 transition-all border border-primary/20"
                     >
                         <RefreshCw className={`w-4 h-4 ${loading ? 'animate-spin' : ''}`} />
@@ -74,6 +87,17 @@ export default function AdminPage() {
                     </button>
                 </div>
 
+                <div className="relative max-w-sm">
+                    <Search className="w-4 h-4 absolute left-3 top-1/2 -translate-y-1/2 text-slate-500" />
+                    <input
+                        type="text"
+                        value={search}
+                        onChange={(e) => setSearch(e.target.value)}
+                        placeholder="Search by name prefix..."
+                        className="w-full pl-10 pr-4 py-2 bg-slate-900/50 border border-white/10 rounded-lg text-slate-200 placeholder-slate-500 focus:outline-none focus:border-primary/40"
+                    />
+                </div>
+
                 <div className="bg-slate-900/50 rounded-2xl border border-white/5 overflow-hidden">
                     <div className="overflow-x-auto">
                         <table className="w-full text-left">
@@ -99,12 +123,23 @@ export default function AdminPage() {
                                         <td className="p-4">
                                             <div className="w-16 h-16 rounded-lg overflow-hidden border border-white/10 bg-black">
                                                 {/* Standard HTML img for simplicity with external local URL */}
+                                                {/* Small cached thumbnail; the full image is the fallback */}
                                                 <img
-                                                    src={`http://127.0.0.1:8000${user.image_url}`}
+                                                    src={`http://127.0.0.1:8000${user.thumbnail_url ?? user.image_url}`}
                                                     alt={user.name}
+                                                    loading="lazy"
+                                                    width={64}
+                                                    height={64}
                                                     className="w-full h-full object-cover"
                                                     onError={(e) => {
-                                                        (e.target as HTMLImageElement).src = 'https://via.placeholder.com/64?text=No+Img';
+                                                        const img = e.target as HTMLImageElement;
+                                                        if (!img.dataset.fallback) {
+                                                            img.dataset.fallback = 'full';
+                                                            img.src = `http://127.0.0.1:8000${user.image_url}`;
+                                                        } else {
+                                                            img.onerror = null;
+                                                            img.src = 'https://via.placeholder.com/64?text=No+Img';
+                                                        }
                                                     }}
                                                 />
                                             </div>
@@ -130,6 +165,17 @@ export default function AdminPage() {
                             </tbody>
                         </table>
                     </div>
+                    {nextCursor && (
+                        <div className="p-4 border-t border-white/5 text-center">
+                            <button
+                                onClick={() => fetchUsers(nextCursor)}
+                                disabled={loading}
+                                className="px-4 py-2 text-sm text-primary rounded-lg hover:bg-primary/10 transition-all disabled:opacity-50"
+                            >
+                                {loading ? 'Loading...' : 'Load more'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
         </main>